@@ -71,26 +71,35 @@ def causes(v):
                     g.add((states[0],"close dock drawer",(object_id,)))
     return g
 
-def run_experiments(check_irr=True):
+# The task name sequences that the rules of causes apply to, so that explain only builds matching child sequences
+causes.signatures = (
+    ("move arm and grasp",), ("put down grasped object",), ("move unobstructed object",), ("move object",), ("move object to free spot",),
+    ("move grasped object","release"), ("move arm and grasp","put down grasped object"),
+    ("move arm and grasp","move grasped object","release"),
+)
+
+def run_experiments(check_irr=True, workers=1):
     results = {}
     # Dock maintenance demos
     demos = ["demo_%s_%d"%(skill, di) for di in [1,2] for skill in ["remove_red_drive","replace_red_with_green","replace_red_with_spare","swap_red_with_green"]]
     # Block stacking demos
     demos += ["demo_il", "demo_ai", "demo_um"]
-    # Cover demos
-    print("Covering demos...")
+    # import demos and ground truths
+    observed, ground_truths = {}, {}
     for demo_name in demos:
-        print(demo_name)
-        # import demo and ground truth
         exec_str = "from baxter_corpus.%s import demo"%demo_name
         exec(exec_str, globals())
         exec_str = "from baxter_corpus.%s_ground_truth import ground_truth"%demo_name
         exec(exec_str, globals())
-        # Cover and prune by each parsimony criterion
+        observed[demo_name], ground_truths[demo_name] = demo, ground_truth
+    # Cover demos
+    print("Covering demos...")
+    for (demo_name, status, tlcovs, g, run_time) in copct.explain_many(causes, observed, M, workers=workers, return_g=True):
+        print(demo_name)
+        u_correct = ground_truths[demo_name]
+        # Prune by each parsimony criterion
         results[demo_name] = {}
-        start_time = time.clock()
-        status, tlcovs, g = copct.explain(causes, demo, M=M)
-        results[demo_name]["run_time"] = time.clock()-start_time
+        results[demo_name]["run_time"] = run_time
         results[demo_name]["tlcovs"], results[demo_name]["g"] = tlcovs, g
         results[demo_name]["tlcovs_mc"] = [u for (u,_,_,_,_) in copct.minCardinalityTLCovers(tlcovs)[0]]
         results[demo_name]["tlcovs_md"] = [u for (u,_,_,_,_) in copct.maxDepthTLCovers(tlcovs)[0]]
@@ -98,22 +107,22 @@ def run_experiments(check_irr=True):
         results[demo_name]["tlcovs_mp"] = [u for (u,_,_,_,_) in copct.minParametersTLCovers(tlcovs)[0]]
         results[demo_name]["tlcovs_fsn"] = [u for (u,_,_,_,_) in copct.minForestSizeTLCovers(tlcovs)[0]]
         results[demo_name]["tlcovs_fsx"] = [u for (u,_,_,_,_) in copct.maxForestSizeTLCovers(tlcovs)[0]]
-        start_time = time.clock()
+        start_time = time.perf_counter()
         if check_irr:
             status, tlcovs_irr = copct.irredundantTLCovers(tlcovs, timeout=1000)
             if status == False: print("IRR timeout")
         else:
             tlcovs_irr = tlcovs
-        results[demo_name]["run_time_irr"] = time.clock()-start_time
+        results[demo_name]["run_time_irr"] = time.perf_counter()-start_time
         results[demo_name]["tlcovs_irr"] = [u for (u,_,_,_,_) in tlcovs_irr]
-        results[demo_name]["u in tlcovs"] = ground_truth in [u for (u,_,_,_,_) in tlcovs]
-        results[demo_name]["u in tlcovs_mc"] = ground_truth in results[demo_name]["tlcovs_mc"]
-        results[demo_name]["u in tlcovs_md"] = ground_truth in results[demo_name]["tlcovs_md"]
-        results[demo_name]["u in tlcovs_xd"] = ground_truth in results[demo_name]["tlcovs_xd"]
-        results[demo_name]["u in tlcovs_mp"] = ground_truth in results[demo_name]["tlcovs_mp"]
-        results[demo_name]["u in tlcovs_fsn"] = ground_truth in results[demo_name]["tlcovs_fsn"]
-        results[demo_name]["u in tlcovs_fsx"] = ground_truth in results[demo_name]["tlcovs_fsx"]
-        results[demo_name]["u in tlcovs_irr"] = ground_truth in results[demo_name]["tlcovs_irr"]
+        results[demo_name]["u in tlcovs"] = u_correct in [u for (u,_,_,_,_) in tlcovs]
+        results[demo_name]["u in tlcovs_mc"] = u_correct in results[demo_name]["tlcovs_mc"]
+        results[demo_name]["u in tlcovs_md"] = u_correct in results[demo_name]["tlcovs_md"]
+        results[demo_name]["u in tlcovs_xd"] = u_correct in results[demo_name]["tlcovs_xd"]
+        results[demo_name]["u in tlcovs_mp"] = u_correct in results[demo_name]["tlcovs_mp"]
+        results[demo_name]["u in tlcovs_fsn"] = u_correct in results[demo_name]["tlcovs_fsn"]
+        results[demo_name]["u in tlcovs_fsx"] = u_correct in results[demo_name]["tlcovs_fsx"]
+        results[demo_name]["u in tlcovs_irr"] = u_correct in results[demo_name]["tlcovs_irr"]
     # display results
     criteria = ["_mc", "_irr", "_md", "_xd", "_mp", "_fsn", "_fsx"]
     print("Accuracy:")
@@ -129,5 +138,5 @@ def run_experiments(check_irr=True):
 
 if __name__ == "__main__":
 
-    check_irr = raw_input("Run irredundancy checks?  May take several minutes. [y/n]")
+    check_irr = input("Run irredundancy checks? [y/n]")
     results = run_experiments(check_irr == "y")
@@ -0,0 +1,629 @@
+#!/usr/bin/env python
+
+import time
+import random
+import tracemalloc
+import multiprocessing as mp
+import os
+import pickle
+import tempfile
+import itertools as it
+import copct
+from baxter_experiments import causes, M
+
+def scan_top_level_covers(g, N, M, u=(), k=(0,), d_min=(), d_max=(), ts=()):
+    """
+    Reference enumerator that scans every end index and predecessor cell, as topLevelCovers used to.
+    Same inputs and outputs as copct.topLevelCovers.
+    """
+    if k[-1]==N:
+        yield (u, k, d_min, d_max, ts)
+    else:
+        for k1 in range(k[-1]+1,N+1):
+            for (u1,_,d1_min, d1_max, ts1) in g[k[-1],k1]:
+                if any([(u+(u1,))[-m:] == v for m in range(1,min(len(k),M)+1) for (_,v,_,_,_) in g[k[-m],k1]]):
+                    continue
+                for t in scan_top_level_covers(g, N, M, u+(u1,), k+(k1,), d_min+(d1_min,), d_max+(d1_max,), ts+(ts1,)):
+                    yield t
+
+def pairwise_irredundant_tlcovs(tlcovs):
+    """
+    Reference implementation that compares every pair of covers, as irredundantTLCovers used to.
+    Same inputs as copct.irredundantTLCovers (without a timeout), outputs the pruned top-level covers.
+    """
+    tlcovs_irr = []
+    for (u,k,d_min,d_max,ts) in tlcovs:
+        u_is_irr = True # until proven otherwise
+        for (other_u,_,_,_,_) in tlcovs:
+            # skip u1
+            if u==other_u: continue
+            # check if other_u is a sub-sequence of u
+            if len(other_u) > len(u):
+                is_sub_seq = False
+            else:
+                is_sub_seq = True # until proven otherwise
+                u_tail = u
+                for other_u_i in other_u:
+                    if other_u_i in u_tail:
+                        u_tail = u_tail[u_tail.index(other_u_i)+1:]
+                    else:
+                        is_sub_seq = False
+                        break
+            # other_u is a sub-sequence of u, u is redundant
+            if is_sub_seq:
+                u_is_irr = False
+                break
+        if u_is_irr:
+            tlcovs_irr.append((u,k,d_min,d_max,ts))
+    return tlcovs_irr
+
+def random_tlcovs(num_tlcovs, num_roots, max_length):
+    """
+    Generate random top-level covers for irredundancy tests.
+    Inputs:
+        num_tlcovs: the number of covers to generate (duplicate root sequences are likely).
+        num_roots: the number of distinct roots to draw from.
+        max_length: the maximum number of roots in a cover.
+    Outputs:
+        tlcovs: a list of (u, k, d_min, d_max, ts) tuples with random roots u.
+    """
+    tlcovs = []
+    for _ in range(num_tlcovs):
+        u = tuple(random.randrange(num_roots) for _ in range(random.randint(0, max_length)))
+        tlcovs.append((u, tuple(range(len(u)+1)), (1,)*len(u), (1,)*len(u), (2,)*len(u)))
+    return tlcovs
+
+def load_baxter_demos():
+    """
+    Load every demonstration in the Baxter corpus.
+    Outputs:
+        demos: list of (demo_name, demo) pairs, shortest demos first.
+    """
+    demo_names = ["demo_%s_%d"%(skill, di) for di in [1,2] for skill in ["remove_red_drive","replace_red_with_green","replace_red_with_spare","swap_red_with_green"]]
+    demo_names += ["demo_il", "demo_ai", "demo_um"]
+    demos = []
+    for demo_name in demo_names:
+        exec_str = "from baxter_corpus.%s import demo"%demo_name
+        scope = {}
+        exec(exec_str, scope)
+        demos.append((demo_name, scope["demo"]))
+    return demos
+
+def load_monroe_demos(num_samples=100, use_original=True):
+    """
+    Load randomly chosen plans from the Monroe corpus, which must first be generated with monroe_corpus/monroe_preprocessing.py.
+    Inputs:
+        num_samples: the number of plans to load.
+        use_original: whether to use the causes function of the original or the modified corpus.
+    Outputs:
+        demos: list of (demo_name, demo) pairs, shortest demos first.
+        causes: the causes function of the Monroe domain.
+        M: the Monroe domain constant.
+    """
+    import monroe_corpus.monroe_domain as md
+    from monroe_corpus.monroe_corpus import corpus
+    samples = random.Random(0).sample(range(len(corpus)), min(num_samples, len(corpus)))
+    demos = sorted([("monroe_%d"%sample, corpus[sample][2]) for sample in samples], key=lambda demo: len(demo[1]))
+    return demos, (md.causes if use_original else md.mid_causes), md.M
+
+def dense_causes(v):
+    """
+    A causal relation where every action and every pair of actions has two causes,
+    so a sequence of N actions has exponentially many optimal top-level covers.
+    """
+    if len(v) <= 2 and all(x[1] == "act" for x in v):
+        return set([((), "a%d"%len(v), ()), ((), "b%d"%len(v), ())])
+    return set()
+
+def benchmark_memory(demos):
+    """
+    Measure the peak memory allocated while constructing the table of singleton sub-covers.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+    Outputs:
+        results[demo_name]: (run_time, peak memory in bytes, total number of sub-covers)
+    """
+    results = {}
+    print("Peak memory of singletonSubCovers:")
+    print(["Demo", "Length", "Runtime", "Peak (KB)", "|g|"])
+    for (demo_name, demo) in demos:
+        tracemalloc.start()
+        start_time = time.time()
+        status, g = copct.singletonSubCovers(causes, M, demo)
+        run_time = time.time()-start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = sum(len(g[jk]) for jk in g)
+        results[demo_name] = (run_time, peak, size)
+        print([demo_name, len(demo), run_time, peak/1024.0, size])
+    return results
+
+def check_strategies(demos):
+    """
+    Check that the seminaive and naive strategies of singletonSubCovers build identical tables,
+    and count the calls each one makes to causes.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+    Outputs:
+        results[demo_name]: {strategy: (run_time, number of causes calls)}
+    """
+    results = {}
+    print("Strategy equivalence of singletonSubCovers:")
+    print(["Demo", "Equivalent", "Runtime (seminaive)", "Runtime (naive)", "Calls (seminaive)", "Calls (naive)"])
+    for (demo_name, demo) in demos:
+        results[demo_name] = {}
+        tables = {}
+        for strategy in ["seminaive", "naive"]:
+            calls = [0]
+            def counted_causes(v):
+                calls[0] += 1
+                return causes(v)
+            start_time = time.time()
+            status, tables[strategy] = copct.singletonSubCovers(counted_causes, M, demo, strategy=strategy)
+            results[demo_name][strategy] = (time.time()-start_time, calls[0])
+        assert tables["seminaive"] == tables["naive"], "%s: strategies disagree"%demo_name
+        print([demo_name, True] + [results[demo_name][s][0] for s in ["seminaive", "naive"]] + [results[demo_name][s][1] for s in ["seminaive", "naive"]])
+    return results
+
+def benchmark_enumeration(demos, demo_names=("demo_ai", "demo_um")):
+    """
+    Compare top-level cover enumeration throughput against the reference scanning enumerator.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+        demo_names: the demos to benchmark.
+    Outputs:
+        results[demo_name]: (covers/second for topLevelCovers, covers/second for the reference)
+    """
+    results = {}
+    print("Top-level cover enumeration throughput:")
+    print(["Demo", "|tlcovs|", "Covers/s (topLevelCovers)", "Covers/s (reference)"])
+    for (demo_name, demo) in demos:
+        if demo_name not in demo_names: continue
+        status, g = copct.singletonSubCovers(causes, M, demo)
+        rates = []
+        for enumerator in [copct.topLevelCovers, scan_top_level_covers]:
+            start_time = time.time()
+            tlcovs = list(enumerator(g, len(demo), M))
+            rates.append(len(tlcovs)/(time.time()-start_time))
+            if enumerator is copct.topLevelCovers: expected = tlcovs
+        assert tlcovs == expected, "%s: enumerators disagree"%demo_name
+        results[demo_name] = tuple(rates)
+        print([demo_name, len(tlcovs)] + rates)
+    return results
+
+def check_bounded_search(demos, causes=causes, M=M, max_tlcovs=None):
+    """
+    Check that bestTLCovers finds exactly the covers kept by pruning a full enumeration.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos or load_monroe_demos.
+        causes, M: the causal relation of the demos (by default, the Baxter domain).
+        max_tlcovs: if given, demos with more top-level covers than this are skipped.
+    Outputs:
+        results[demo_name]: {criterion: (run time of bestTLCovers, run time of the full enumeration and pruning)}
+    """
+    results = {}
+    print("Branch-and-bound search:")
+    print(["Demo", "Criterion", "Extremum", "Runtime (bestTLCovers)", "Runtime (enumerate and prune)"])
+    for (demo_name, demo) in demos:
+        status, g = copct.singletonSubCovers(causes, M, demo)
+        if max_tlcovs is not None:
+            num_tlcovs = sum(1 for _ in it.islice(copct.topLevelCovers(g, len(demo), M), max_tlcovs+1))
+            if num_tlcovs > max_tlcovs: continue
+        results[demo_name] = {}
+        for (criterion, prune) in [("mc", copct.minCardinalityTLCovers), ("fsn", copct.minForestSizeTLCovers)]:
+            start_time = time.time()
+            best = copct.bestTLCovers(g, len(demo), M, criterion)
+            search_time = time.time()-start_time
+            start_time = time.time()
+            pruned = prune(list(copct.topLevelCovers(g, len(demo), M)))
+            prune_time = time.time()-start_time
+            assert best == pruned, "%s: bestTLCovers disagrees on %s"%(demo_name, criterion)
+            results[demo_name][criterion] = (search_time, prune_time)
+            print([demo_name, criterion, best[1], search_time, prune_time])
+    return results
+
+def check_best_timeout(N=28, timeout=1.0, slack=1.0):
+    """
+    Check that explain_best respects its timeout when it searches with bestTLCovers,
+    on a dense causal relation whose search takes much longer than the timeout.
+    Inputs:
+        N: the length of the observed sequence.
+        timeout: the timeout passed to explain_best.
+        slack: the number of seconds explain_best may overrun its timeout.
+    Outputs:
+        results[criterion]: (status, run time of explain_best)
+    """
+    results = {}
+    print("explain_best timeout:")
+    print(["Criterion", "Status", "Runtime", "Timeout"])
+    w = tuple(((), "act", ()) for _ in range(N))
+    for criterion in ["mc", "fsn"]:
+        start_time = time.perf_counter()
+        status, _, _ = copct.explain_best(dense_causes, w, M=2, criterion=criterion, timeout=timeout)
+        runtime = time.perf_counter()-start_time
+        assert runtime < timeout + slack, "explain_best(%s) ran for %fs with a timeout of %fs"%(criterion, runtime, timeout)
+        results[criterion] = (status, runtime)
+        print([criterion, status, runtime, timeout])
+    assert results["fsn"][0] == "TL covers timed out", "explain_best(fsn) finished within its timeout"
+    return results
+
+def check_irredundancy(num_trials=200, num_tlcovs=(1000, 10000)):
+    """
+    Check irredundantTLCovers against the pairwise reference on random cover sets, then time it on larger ones.
+    Runs interrupted by a deadline are checked to return only irredundant covers, including every one of their length or shorter.
+    Inputs:
+        num_trials: the number of small random cover sets to check.
+        num_tlcovs: the sizes of the random cover sets to time.
+    Outputs:
+        results[n]: (run time of irredundantTLCovers, run time of the reference) on n covers
+    """
+    for trial in range(num_trials):
+        tlcovs = random_tlcovs(random.randint(0, 60), random.randint(1, 6), random.randint(0, 6))
+        status, tlcovs_irr = copct.irredundantTLCovers(tlcovs)
+        assert status and tlcovs_irr == pairwise_irredundant_tlcovs(tlcovs), "irredundantTLCovers disagrees on %s"%(tlcovs,)
+        # a deadline that passes after a random number of checks, counted by its clock
+        deadline = copct.Deadline(random.randint(0, len(tlcovs)), clock=it.count().__next__, check_every=1)
+        status, tlcovs_partial = copct.irredundantTLCovers(tlcovs, timeout=deadline)
+        length = max([len(u) for (u,_,_,_,_) in tlcovs_partial] + [0])
+        assert not status or tlcovs_partial == tlcovs_irr
+        assert tlcovs_partial == [t for t in tlcovs_irr if len(t[0]) <= length], "irredundantTLCovers timed out with unverified covers on %s"%(tlcovs,)
+    print("irredundantTLCovers matched the reference on %d random cover sets"%num_trials)
+    results = {}
+    print(["|tlcovs|", "|tlcovs_irr|", "Runtime (irredundantTLCovers)", "Runtime (reference)"])
+    for n in num_tlcovs:
+        tlcovs = random_tlcovs(n, 4*n, 12)
+        start_time = time.time()
+        status, tlcovs_irr = copct.irredundantTLCovers(tlcovs)
+        irr_time = time.time()-start_time
+        start_time = time.time()
+        assert tlcovs_irr == pairwise_irredundant_tlcovs(tlcovs)
+        results[n] = (irr_time, time.time()-start_time)
+        print([n, len(tlcovs_irr)] + list(results[n]))
+    return results
+
+def check_interning(demos, repeats=5):
+    """
+    Check that explain returns the same covers and table with and without interning, and time both.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+        repeats: the number of runs timed, of which the fastest is reported.
+    Outputs:
+        results[demo_name]: (run time with interning, run time without)
+    """
+    results = {}
+    print("Interning in explain:")
+    print(["Demo", "|tlcovs|", "Runtime (interned)", "Runtime (raw)"])
+    for (demo_name, demo) in demos:
+        outputs, run_times = [], []
+        for intern in [True, False]:
+            times = []
+            for _ in range(repeats):
+                start_time = time.perf_counter()
+                output = copct.explain(causes, demo, M=M, intern=intern)
+                times.append(time.perf_counter()-start_time)
+            outputs.append(output)
+            run_times.append(min(times))
+        # covers may be enumerated in a different order, since sets of ids and of elements iterate differently
+        (status, tlcovs, g), (raw_status, raw_tlcovs, raw_g) = outputs
+        assert (status, sorted(tlcovs), g) == (raw_status, sorted(raw_tlcovs), raw_g), "%s: interning changed the output"%demo_name
+        results[demo_name] = tuple(run_times)
+        print([demo_name, len(outputs[0][1])] + run_times)
+    return results
+
+def benchmark_workers(demos, demo_names=("demo_ai", "demo_um"), max_workers=None):
+    """
+    Check that singletonSubCovers builds the same table with any number of worker processes, and time it.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+        demo_names: the demos to benchmark.
+        max_workers: the largest number of workers to try (defaults to the number of CPUs).
+    Outputs:
+        results[demo_name][workers]: run time with that many workers
+    """
+    if max_workers is None: max_workers = mp.cpu_count()
+    results = {}
+    print("Scaling of singletonSubCovers with worker processes:")
+    print(["Demo", "Workers", "Runtime", "Speedup"])
+    for (demo_name, demo) in demos:
+        if demo_name not in demo_names: continue
+        results[demo_name] = {}
+        for workers in range(1, max_workers+1):
+            start_time = time.time()
+            status, g = copct.singletonSubCovers(causes, M, demo, workers=workers)
+            results[demo_name][workers] = time.time()-start_time
+            if workers == 1: expected = g
+            assert g == expected, "%s: %d workers disagree with serial mode"%(demo_name, workers)
+            print([demo_name, workers, results[demo_name][workers], results[demo_name][1]/results[demo_name][workers]])
+    return results
+
+def benchmark_parallel_enumeration(demos, demo_names=("demo_ai", "demo_um"), max_workers=None):
+    """
+    Check that parallelTopLevelCovers yields the covers of topLevelCovers, in the same order when ordered, and time it.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+        demo_names: the demos to benchmark.
+        max_workers: the largest number of workers to try (defaults to the number of CPUs).
+    Outputs:
+        results[demo_name][workers, ordered]: covers/second with that many workers
+    """
+    if max_workers is None: max_workers = mp.cpu_count()
+    results = {}
+    print("Top-level cover enumeration with worker processes:")
+    print(["Demo", "Workers", "Ordered", "Covers/s"])
+    for (demo_name, demo) in demos:
+        if demo_name not in demo_names: continue
+        status, g = copct.singletonSubCovers(causes, M, demo)
+        expected = list(copct.topLevelCovers(g, len(demo), M))
+        results[demo_name] = {}
+        for workers in range(1, max_workers+1):
+            for ordered in [True, False]:
+                start_time = time.time()
+                tlcovs = list(copct.parallelTopLevelCovers(g, len(demo), M, workers, ordered=ordered))
+                results[demo_name][workers, ordered] = len(tlcovs)/(time.time()-start_time)
+                if ordered: assert tlcovs == expected, "%s: ordered enumeration disagrees"%demo_name
+                else: assert sorted(tlcovs) == sorted(expected), "%s: unordered enumeration disagrees"%demo_name
+                print([demo_name, workers, ordered, results[demo_name][workers, ordered]])
+    return results
+
+def benchmark_deadline(demos, num_checks=1000000, demo_name="demo_um"):
+    """
+    Measure the overhead of timeout checks with copct.Deadline.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+        num_checks: the number of checks to time in a tight loop.
+        demo_name: the demo on which to time singletonSubCovers.
+    Outputs:
+        results["ns/check"][check_every]: nanoseconds per check in a tight loop
+        results["singletonSubCovers"][check_every]: run time of singletonSubCovers with that check interval
+    """
+    results = {"ns/check": {}, "singletonSubCovers": {}}
+    print("Timeout check overhead:")
+    print(["Check every", "ns/check", "Runtime (singletonSubCovers)"])
+    demo = dict(demos)[demo_name]
+    for check_every in [1, 16, 256]:
+        deadline = copct.Deadline(600, check_every=check_every)
+        start_time = time.perf_counter()
+        for _ in range(num_checks): deadline.check()
+        results["ns/check"][check_every] = 1e9*(time.perf_counter()-start_time)/num_checks
+        start_time = time.perf_counter()
+        copct.singletonSubCovers(causes, M, demo, timeout=copct.Deadline(600, check_every=check_every))
+        results["singletonSubCovers"][check_every] = time.perf_counter()-start_time
+        print([check_every, results["ns/check"][check_every], results["singletonSubCovers"][check_every]])
+    return results
+
+def check_incremental(demos):
+    """
+    Check that IncrementalExplainer keeps the same table and top-level covers as singletonSubCovers on every prefix,
+    and that an append interrupted by its timeout is undone, and time each append.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+    Outputs:
+        results[demo_name]: list of run times of each append
+    """
+    results = {}
+    print("Incremental explanation:")
+    print(["Demo", "Length", "Max append", "Total append", "Runtime (singletonSubCovers)"])
+    for (demo_name, demo) in demos:
+        explainer = copct.IncrementalExplainer(causes, M)
+        results[demo_name] = []
+        for action in demo:
+            start_time = time.perf_counter()
+            explainer.append(action)
+            results[demo_name].append(time.perf_counter()-start_time)
+            N = len(explainer.w)
+            status, g = copct.singletonSubCovers(causes, M, demo[:N])
+            assert explainer.g == g, "%s: tables disagree after %d actions"%(demo_name, N)
+            assert sorted(explainer.topLevelCovers()) == sorted(copct.topLevelCovers(g, N, M)), "%s: covers disagree after %d actions"%(demo_name, N)
+        # an append interrupted by its timeout leaves the explainer as it was
+        explainer = copct.IncrementalExplainer(causes, M)
+        for action in demo[:-1]: explainer.append(action)
+        before = (explainer.w, dict(explainer.g), [list(ends) for ends in explainer.ends], dict(explainer.forbidden))
+        assert not explainer.append(demo[-1], timeout=copct.Deadline(0, clock=it.count().__next__, check_every=1))
+        assert (explainer.w, explainer.g, explainer.ends, explainer.forbidden) == before, "%s: interrupted append changed the explainer"%demo_name
+        assert explainer.append(demo[-1], timeout=600) and explainer.g == g, "%s: tables disagree after an interrupted append"%demo_name
+        start_time = time.perf_counter()
+        copct.singletonSubCovers(causes, M, demo)
+        print([demo_name, len(demo), max(results[demo_name]), sum(results[demo_name]), time.perf_counter()-start_time])
+    return results
+
+def benchmark_cover_set(demos, demo_names=("demo_ai", "demo_um")):
+    """
+    Check that CoverSet.best agrees with the pruning functions on every parsimony criterion, and time both.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+        demo_names: the demos to benchmark.
+    Outputs:
+        results[demo_name]: (run time of CoverSet and best, run time of the six pruning functions)
+    """
+    pruning = {"mc": copct.minCardinalityTLCovers, "md": copct.maxDepthTLCovers, "xd": copct.minimaxDepthTLCovers,
+        "fsn": copct.minForestSizeTLCovers, "fsx": copct.maxForestSizeTLCovers, "mp": copct.minParametersTLCovers}
+    results = {}
+    print("Parsimony criteria over a CoverSet:")
+    print(["Demo", "|tlcovs|", "Runtime (CoverSet)", "Runtime (pruning functions)"])
+    for (demo_name, demo) in demos:
+        if demo_name not in demo_names: continue
+        status, tlcovs, g = copct.explain(causes, demo, M=M)
+        start_time = time.perf_counter()
+        best = copct.CoverSet(tlcovs).best(list(pruning))
+        cover_set_time = time.perf_counter()-start_time
+        start_time = time.perf_counter()
+        pruned = {label: pruning[label](tlcovs) for label in pruning}
+        pruning_time = time.perf_counter()-start_time
+        for label in pruning:
+            assert (list(best[label][0]), best[label][1]) == pruned[label], "%s: CoverSet disagrees on %s"%(demo_name, label)
+        results[demo_name] = (cover_set_time, pruning_time)
+        print([demo_name, len(tlcovs), cover_set_time, pruning_time])
+    return results
+
+def check_cover_files(demos):
+    """
+    Check that covers saved with save_covers are read back unchanged, and compare file sizes and times with pickle.
+    If NumPy is available, also check that score_covers streams the same scores from the file as CoverSet.best.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+    Outputs:
+        results[demo_name]: (cover file size, pickle size, save time, time to iterate over the loaded covers)
+    """
+    results = {}
+    print("Cover files:")
+    print(["Demo", "|tlcovs|", "Size (bytes)", "Pickle size (bytes)", "Runtime (save)", "Runtime (load and iterate)"])
+    directory = tempfile.mkdtemp()
+    for (demo_name, demo) in demos:
+        status, tlcovs, g = copct.explain(causes, demo, M=M)
+        filename = os.path.join(directory, "%s.covers"%demo_name)
+        start_time = time.perf_counter()
+        copct.save_covers(filename, tlcovs)
+        save_time = time.perf_counter()-start_time
+        start_time = time.perf_counter()
+        with copct.load_covers(filename) as loaded:
+            assert list(loaded) == tlcovs, "%s: loaded covers differ"%demo_name
+        load_time = time.perf_counter()-start_time
+        if copct.np is not None:
+            best = copct.CoverSet(tlcovs).best()
+            u = tlcovs[len(tlcovs)//2][0]
+            with copct.load_covers(filename) as loaded:
+                num_tlcovs, found, scores = copct.score_covers(loaded, u, chunk_size=100)
+            assert (num_tlcovs, found) == (len(tlcovs), True), "%s: streamed cover count differs"%demo_name
+            for (label, (tlcovs_best, extremum)) in best.items():
+                expected = (extremum, len(tlcovs_best), bool(tlcovs_best.matches(u).any()))
+                assert scores[label] == expected, "%s: streamed %s scores differ"%(demo_name, label)
+        results[demo_name] = (os.path.getsize(filename), len(pickle.dumps(tlcovs, pickle.HIGHEST_PROTOCOL)), save_time, load_time)
+        os.remove(filename)
+        print([demo_name, len(tlcovs)] + list(results[demo_name]))
+    os.rmdir(directory)
+    return results
+
+def check_stats(demos):
+    """
+    Check that ExplainStats counts the same covers for every strategy and worker count,
+    and the same causes calls for both serial strategies, matching the misses of an external cache.
+    (Worker processes each fill their own cache, so they may call causes more often.)
+    causes is wrapped without its signatures, which the naive strategy does not use (see check_signatures).
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+    Outputs:
+        stats[demo_name]: the ExplainStats of the default seminaive run
+    """
+    all_stats = {}
+    unpruned = lambda v: causes(v)
+    print("Explain stats:")
+    for (demo_name, demo) in demos:
+        runs = {}
+        for kwargs in ({}, {"workers": 2}, {"strategy": "naive"}):
+            stats = copct.ExplainStats()
+            copct.explain(unpruned, demo, M=M, stats=stats, **kwargs)
+            runs[tuple(kwargs.items())] = stats
+        stats = runs[()]
+        assert runs[(("strategy", "naive"),)].causes_calls == stats.causes_calls, "%s: causes calls differ"%demo_name
+        for other in runs.values():
+            assert other.num_tlcovs == stats.num_tlcovs, "%s: top-level cover counts differ"%demo_name
+            assert [level["table_size"] for level in other.levels] == [level["table_size"] for level in stats.levels]
+        cached = copct.cached_causes(unpruned)
+        copct.explain(cached, demo, M=M)
+        assert cached.misses == stats.causes_calls, "%s: causes calls differ from cache misses"%demo_name
+        all_stats[demo_name] = stats
+        print(demo_name)
+        print(stats)
+    return all_stats
+
+def check_signatures(demos):
+    """
+    Check that declaring the rule signatures of causes does not change the explanations,
+    and count the child sequences examined with and without them.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+    Outputs:
+        results[demo_name]: {"signatures"/"none": (run_time, number of child sequences examined)}
+    """
+    results = {}
+    print("Rule signatures:")
+    print(["Demo", "Equivalent", "Runtime (signatures)", "Runtime (none)", "Tuples (signatures)", "Tuples (none)"])
+    for (demo_name, demo) in demos:
+        results[demo_name] = {}
+        tlcovs = {}
+        for (label, signatures) in [("signatures", causes.signatures), ("none", None)]:
+            stats = copct.ExplainStats()
+            start_time = time.perf_counter()
+            status, tlcovs[label], g = copct.explain(lambda v: causes(v), demo, M=M, stats=stats, signatures=signatures)
+            results[demo_name][label] = (time.perf_counter()-start_time, sum(level["tuples"] for level in stats.levels))
+        assert sorted(map(repr, tlcovs["signatures"])) == sorted(map(repr, tlcovs["none"])), "%s: explanations differ"%demo_name
+        print([demo_name, True] + [results[demo_name][l][0] for l in ["signatures", "none"]] + [results[demo_name][l][1] for l in ["signatures", "none"]])
+    return results
+
+def dying_causes(v, parent=os.getpid()):
+    """
+    The Baxter causal relation, except that any worker process calling it exits immediately.
+    """
+    if os.getpid() != parent: os._exit(3)
+    return causes(v)
+
+class DyingCells(dict):
+    """
+    A table of singleton sub-covers, except that any worker process reading it exits immediately.
+    """
+    def __getitem__(self, jk, parent=os.getpid()):
+        if os.getpid() != parent: os._exit(3)
+        return dict.__getitem__(self, jk)
+
+def check_worker_failures(demos, demo_name="demo_ai", timeout=60, slack=5):
+    """
+    Check that a worker process that dies is reported as an error, rather than waited for.
+    Inputs:
+        demos: list of (demo_name, demo) pairs as returned by load_baxter_demos.
+        demo_name: the demo to explain.
+        timeout: the timeout passed to explain.
+        slack: the number of seconds it may take to notice the failure.
+    Outputs:
+        results["singletonSubCovers"]: the run time until the failure was raised
+        results["parallelTopLevelCovers", ordered]: likewise for top-level cover enumeration
+    """
+    results = {}
+    print("Worker failures:")
+    demo = dict(demos)[demo_name]
+    start_time = time.perf_counter()
+    try:
+        copct.singletonSubCovers(dying_causes, M, demo, workers=2, timeout=timeout)
+        assert False, "singletonSubCovers did not report its dead workers"
+    except RuntimeError as e:
+        results["singletonSubCovers"] = time.perf_counter()-start_time
+        print(["singletonSubCovers", results["singletonSubCovers"], str(e)])
+    assert results["singletonSubCovers"] < slack, "singletonSubCovers took %fs to notice its dead workers"%results["singletonSubCovers"]
+    status, g = copct.singletonSubCovers(causes, M, demo)
+    g = DyingCells(g)
+    for ordered in [True, False]:
+        start_time = time.perf_counter()
+        try:
+            list(copct.parallelTopLevelCovers(g, len(demo), M, 2, ordered=ordered))
+            assert False, "parallelTopLevelCovers did not report its dead workers"
+        except RuntimeError as e:
+            results["parallelTopLevelCovers", ordered] = time.perf_counter()-start_time
+            print(["parallelTopLevelCovers", ordered, results["parallelTopLevelCovers", ordered], str(e)])
+        assert results["parallelTopLevelCovers", ordered] < slack, "parallelTopLevelCovers took %fs to notice its dead workers"%results["parallelTopLevelCovers", ordered]
+    return results
+
+if __name__ == "__main__":
+
+    demos = load_baxter_demos()
+    check_strategies(demos)
+    benchmark_memory(demos)
+    benchmark_enumeration(demos)
+    check_bounded_search(demos)
+    check_best_timeout()
+    check_irredundancy()
+    check_interning(demos)
+    benchmark_workers(demos)
+    benchmark_parallel_enumeration(demos)
+    benchmark_deadline(demos)
+    check_incremental(demos)
+    if copct.np is not None: benchmark_cover_set(demos)
+    check_cover_files(demos)
+    check_stats(demos)
+    check_signatures(demos)
+    check_worker_failures(demos)
+
+    try:
+        monroe_demos, monroe_causes, monroe_M = load_monroe_demos()
+    except ImportError:
+        print("Monroe corpus not found, skipping its checks (see monroe_corpus/monroe_preprocessing.py)")
+    else:
+        check_bounded_search(monroe_demos, monroe_causes, monroe_M, max_tlcovs=100000)
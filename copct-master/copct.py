@@ -1,7 +1,220 @@
 import itertools as itr
 import time as time
+import os as os
+import gzip as gz
+import pickle as pkl
+import struct as st
+import mmap as mm
+import collections as col
+import multiprocessing as mp
+import multiprocessing.connection as mpc
+import queue as qu
+import traceback as tb
+try:
+    import numpy as np
+except ImportError:
+    np = None # CoverSet is unavailable
 
-def singletonSubCovers(causes, M, w, verbose=False, timeout=300):
+class Deadline(object):
+    """
+    A time budget that can be shared by the stages of a computation, such as the stages of explain.
+    Reading the clock costs a system call, so check() only reads it once every check_every calls.
+    Attributes:
+        timeout: The number of seconds in the budget.
+        clock: The clock measuring the budget, time.perf_counter (wall clock) or time.process_time (CPU time).
+        start: The clock reading when the deadline was created.
+        check_every: The number of calls to check() between clock readings.
+    """
+    def __init__(self, timeout, clock=time.perf_counter, check_every=256):
+        self.timeout = timeout
+        self.clock = clock
+        self.start = clock()
+        self.check_every = check_every
+        self._countdown = 1 # read the clock on the first check
+        self._expired = False
+    def elapsed(self):
+        return self.clock() - self.start
+    def remaining(self):
+        return self.timeout - self.elapsed()
+    def check(self):
+        """
+        Returns True if the deadline has passed, as of the last clock reading.
+        """
+        self._countdown -= 1
+        if self._countdown == 0:
+            self._countdown = self.check_every
+            self._expired = self.elapsed() > self.timeout
+        return self._expired
+
+class ExplainStats(object):
+    """
+    Profiling counters filled in by singletonSubCovers, explain and explain_best when passed as their stats argument.
+    Attributes:
+        levels: One dictionary per level of singletonSubCovers (including a level interrupted by the timeout), with keys
+            "ell": the level,
+            "wall_time", "cpu_time": the seconds spent on the level (by time.perf_counter and time.process_time),
+            "causes_calls": the number of calls counted by counted() during the level,
+            "tuples": the number of child sequences (product tuples) examined,
+            "new_covers": the number of covers first found at the level,
+            "max_cell": the largest number of covers in one cell of the table after the level,
+            "table_size": the total number of covers in the table after the level.
+        causes_calls: The total number of calls counted by counted().
+            explain counts the calls that reach its causes argument (after the LRU cache),
+            unless causes is already a CachedCauses instance, whose misses count them instead.
+        num_tlcovs: The number of top-level covers enumerated by explain.
+        tl_wall_time, tl_cpu_time: The seconds spent enumerating top-level covers.
+        status: The exit status of explain.
+        callback: Optional function called as callback(stats) after each level and after top-level enumeration.
+    """
+    def __init__(self, callback=None):
+        self.levels = []
+        self.causes_calls = 0
+        self.num_tlcovs = 0
+        self.tl_wall_time, self.tl_cpu_time = 0.0, 0.0
+        self.status = None
+        self.callback = callback
+    def counted(self, causes):
+        """
+        Wraps a causes function so that each call is added to causes_calls.
+        """
+        def counted_causes(v):
+            self.causes_calls += 1
+            return causes(v)
+        return counted_causes
+    def covers_per_second(self):
+        if self.tl_wall_time == 0: return 0.0
+        return self.num_tlcovs / self.tl_wall_time
+    def __str__(self):
+        lines = ["%d levels, %d causes calls, %d tuples, %d top-level covers (%.0f covers/s)"%(
+            len(self.levels), self.causes_calls, sum(level["tuples"] for level in self.levels), self.num_tlcovs, self.covers_per_second())]
+        for level in self.levels:
+            lines.append("ell=%(ell)d: %(wall_time).3fs wall, %(cpu_time).3fs cpu, %(causes_calls)d causes calls, %(tuples)d tuples, "%level
+                + "%(new_covers)d new covers, max |g| = %(max_cell)d, total |g| = %(table_size)d"%level)
+        return "\n".join(lines)
+    def _startLevel(self):
+        return (time.perf_counter(), time.process_time(), self.causes_calls)
+    def _recordLevel(self, ell, started, num_tuples, num_new, cell_sizes):
+        wall_start, cpu_start, calls_start = started
+        cell_sizes = list(cell_sizes)
+        self.levels.append({"ell": ell, "wall_time": time.perf_counter()-wall_start, "cpu_time": time.process_time()-cpu_start,
+            "causes_calls": self.causes_calls-calls_start, "tuples": num_tuples, "new_covers": num_new,
+            "max_cell": max(cell_sizes) if len(cell_sizes) > 0 else 0, "table_size": sum(cell_sizes)})
+        if self.callback is not None: self.callback(self)
+
+class _Signatures(object):
+    """
+    The task name sequences ("signatures") of the rules in a causal relation.
+    singletonSubCovers uses them to only build child sequences whose task names match a rule.
+    The task name of an element u is u[1], as in (state, task name, parameters) elements.
+    Attributes:
+        complete: The set of signatures.
+        prefixes: The set of non-empty prefixes of the signatures.
+        lengths: The set of signature lengths.
+        symbols: The _SymbolTable of interned elements, or None if elements are not interned.
+    """
+    def __init__(self, signatures, symbols=None):
+        self.complete = set(tuple(signature) for signature in signatures)
+        self.prefixes = set(signature[:i] for signature in self.complete for i in range(1, len(signature)+1))
+        self.lengths = set(len(signature) for signature in self.complete)
+        self.symbols = symbols
+    def name(self, u):
+        if self.symbols is not None: u = self.symbols.symbols[u]
+        return u[1]
+    def group(self, table):
+        """
+        Splits each cell of a table into (task name, covers whose root has that name) pairs.
+        """
+        grouped = {}
+        for jk in table:
+            by_name = {}
+            for uvdt in table[jk]:
+                by_name.setdefault(self.name(uvdt[0]), []).append(uvdt)
+            grouped[jk] = list(by_name.items())
+        return grouped
+
+def _signatures(signatures, symbols=None):
+    """
+    Returns signatures as a _Signatures instance (or None if there are none).
+    """
+    if signatures is None or isinstance(signatures, _Signatures): return signatures
+    return _Signatures(signatures, symbols)
+
+def _mpContext():
+    """
+    The multiprocessing context of copct's worker processes: forked where available,
+    so that causes and the table of sub-covers do not need to be pickled.
+    """
+    if "fork" in mp.get_all_start_methods(): return mp.get_context("fork")
+    return mp.get_context()
+
+# seconds between checks that worker processes are still alive, while waiting for their results
+_POLL_INTERVAL = 0.1
+
+def _checkWorkers(processes, name, stops, queue):
+    """
+    Raises RuntimeError if one of the worker processes of name crashed, if more of them have exited than
+    were told to stop (stops), or if all of them have exited and queue has nothing left from them.
+    """
+    for p in processes:
+        if p.exitcode is not None and p.exitcode != 0:
+            raise RuntimeError("%s worker died with exit code %d"%(name, p.exitcode))
+    exited = sum(1 for p in processes if not p.is_alive())
+    if exited > stops or (exited == len(processes) and queue.empty()):
+        raise RuntimeError("%s worker exited before finishing"%name)
+
+def _deadline(timeout):
+    """
+    Returns timeout if it is already a Deadline, otherwise a new Deadline of timeout seconds.
+    """
+    if isinstance(timeout, Deadline): return timeout
+    return Deadline(timeout)
+
+class CachedCauses(object):
+    """
+    A causes function that memoizes another causes function with a bounded LRU cache.
+    Attributes:
+        causes: The wrapped causes function.
+        maxsize: The maximum number of child sequences whose causes are kept in the cache.
+        hits: The number of calls answered from the cache.
+        misses: The number of calls passed on to the wrapped causes function.
+        evictions: The number of least-recently used entries dropped from the cache.
+        signatures: The signatures attribute of the wrapped causes function, if any (see singletonSubCovers).
+    """
+    def __init__(self, causes, maxsize):
+        self.causes = causes
+        self.signatures = getattr(causes, "signatures", None)
+        self.maxsize = maxsize
+        self.cache = col.OrderedDict()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+    def __call__(self, v):
+        if v in self.cache:
+            self.hits += 1
+            self.cache[v] = self.cache.pop(v) # mark as most recently used
+            return self.cache[v]
+        self.misses += 1
+        self.cache[v] = self.causes(v)
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+        return self.cache[v]
+    def __str__(self):
+        return "%d hits, %d misses, %d evictions"%(self.hits, self.misses, self.evictions)
+
+def cached_causes(causes, maxsize=65536):
+    """
+    Wraps a causes function with a bounded LRU cache keyed on the child sequence.
+    The same wrapper can be passed to several calls of explain on the same demo to share the cache.
+    Inputs:
+        causes: The handle to the causes function that defines the causal relation.
+        maxsize: The maximum number of child sequences whose causes are kept in the cache.
+    Outputs:
+        cached: A CachedCauses instance that can be used in place of causes.
+            cached.hits, cached.misses and cached.evictions count cache activity.
+    """
+    if isinstance(causes, CachedCauses): return causes
+    return CachedCauses(causes, maxsize)
+
+def singletonSubCovers(causes, M, w, verbose=False, timeout=300, strategy="seminaive", progress=None, workers=1, checkpoint=None, resume_from=None, stats=None, signatures=None):
     """
     Finds all singleton covers for each sub-sequence of an observed sequence.
     Inputs:
@@ -9,7 +222,31 @@ def singletonSubCovers(causes, M, w, verbose=False, timeout=300):
         M: The upper bound on the length of any effect sequence in the causal relation.
         w: The observed sequence to be explained.
         verbose: Boolean flag for whether to print out status updates.
-        timeout: The maximum number of seconds to allow singletonSubCovers to run.
+        timeout: The maximum number of seconds to allow singletonSubCovers to run, or a Deadline shared with the caller.
+        strategy: How the fixpoint is computed, either
+            "seminaive": only expand combinations that include a cover derived at the previous level, or
+            "naive": re-expand every combination at every level.
+        progress: Optional callback invoked as progress(ell, num_new) after each level ell, where
+            num_new[j,k] is the number of covers of w[j:k] first found at that level (cells with none are omitted).
+            The fixpoint is reached at the first level with an empty num_new.
+        workers: The number of processes that expand each level of the "seminaive" strategy.
+            The processes are started once for the whole fixpoint.  Each level is split into chunks of roughly
+            equal estimated cost, and the new covers found by each process are merged once the level is done,
+            so the table is the same as with workers=1.
+            Where available, the processes are forked so that causes and the table do not need to be pickled.
+        checkpoint: Optional file name.  After each level of the "seminaive" strategy, the table and the covers
+            new at that level are saved there (as a gzipped pickle, replacing the file atomically).
+        resume_from: Optional file name of a checkpoint saved for the same w and M, from which to resume.
+            The level that was interrupted is redone.  If the file does not exist, the run starts from scratch,
+            so a job can be restarted with the same arguments after it is killed or times out.
+        stats: Optional ExplainStats to which per-level counters are added.
+            Calls to causes are only counted if causes was wrapped with stats.counted.
+        signatures: Optional collection of the task name sequences that rules of the causal relation apply to,
+            e.g. [("move-to",), ("move-to", "stack")], where the task name of an element u is u[1].
+            The "seminaive" strategy then only builds the child sequences whose task names are one of these,
+            skipping combinations as soon as their task names stop being a prefix of one.
+            causes must return the empty set for every other child sequence.
+            Defaults to causes.signatures if causes has that attribute.
     Outputs:
         status: True if the run finished, False if it timed out.
         g: The table of singleton sub-covers.
@@ -20,28 +257,368 @@ def singletonSubCovers(causes, M, w, verbose=False, timeout=300):
                 d_max is the longest causal chain length in the covering tree,
                 ts is the total number of nodes in the covering tree.
     """
-    start = time.clock()
+    if strategy == "naive":
+        if workers > 1: raise ValueError("The naive strategy does not support workers > 1")
+        if checkpoint is not None or resume_from is not None: raise ValueError("The naive strategy does not support checkpoints")
+        return _naiveSingletonSubCovers(causes, M, w, verbose=verbose, timeout=timeout, progress=progress, stats=stats)
+    if strategy != "seminaive":
+        raise ValueError("Unknown singletonSubCovers strategy: %s"%strategy)
+    deadline = _deadline(timeout)
+    if signatures is None: signatures = getattr(causes, "signatures", None)
+    signatures = _signatures(signatures)
+    # Initialize the table: g[j,k] maps each singleton sub-cover of w[j:k] to the level that produced it
+    N = len(w)
+    g = {(j,k): {} for (j,k) in itr.combinations(range(N+1),2)}
+    for j in range(N):
+        g[j,j+1][w[j], (), 0, 0, 1] = 0 # 0-based indexing into w
+    # frontier[j,k]: the covers of w[j:k] that are new at the previous level
+    frontier = {(j,j+1): list(g[j,j+1]) for j in range(N)}
+    first_level = 1
+    if resume_from is not None and os.path.exists(resume_from):
+        ell, g, frontier = _loadCheckpoint(resume_from, w, M)
+        first_level = ell+1
+        if verbose: print("Resuming from level %d of %s"%(ell, resume_from))
+    # the worker processes that expand each level, started once for the whole fixpoint
+    pool = _LevelPool(causes, g, N, M, workers, stats, signatures) if workers > 1 else None
+    try:
+        for ell in itr.count(first_level):
+            # covers produced at this level, committed once the level is done
+            if stats is not None: started = stats._startLevel()
+            if pool is not None:
+                finished, new_covers, num_tuples, num_calls = pool.expand(ell, g, frontier, deadline.remaining())
+                if stats is not None: stats.causes_calls += num_calls
+            else:
+                old = _oldCovers(g, frontier, ell)
+                finished, new_covers, num_tuples = _expandLevel(causes, g, old, frontier, N, M, None, deadline, signatures)
+            if stats is not None:
+                stats._recordLevel(ell, started, num_tuples, sum(len(new_covers[jk]) for jk in new_covers),
+                    (len(g[jk]) + len(new_covers.get(jk, ())) for jk in g))
+            if not finished:
+                return False, _subCoverSets(g, new_covers)
+            for jk in new_covers:
+                for uvdt_new in new_covers[jk]:
+                    g[jk][uvdt_new] = ell
+            frontier = {jk: list(new_covers[jk]) for jk in new_covers}
+            if checkpoint is not None:
+                _saveCheckpoint(checkpoint, w, M, ell, g, frontier)
+            if progress is not None:
+                progress(ell, {jk: len(frontier[jk]) for jk in frontier})
+            if verbose:
+                print("ell=%d, max |g| = %d"%(ell, max([len(g[jk]) for jk in g])))
+            if len(frontier) == 0:
+                return True, _subCoverSets(g)
+    finally:
+        if pool is not None: pool.close()
+
+def _oldCovers(g, frontier, ell):
+    """
+    The covers of each w[j:k] from the levels before ell-1, i.e., in g but not in the frontier of level ell.
+    Cells with none are omitted.
+    """
+    return {jk: [uvdt for uvdt in g[jk] if g[jk][uvdt] < ell-1] for jk in g if len(g[jk]) > len(frontier.get(jk, ()))}
+
+def _saveCheckpoint(filename, w, M, ell, g, frontier):
+    """
+    Save the state of singletonSubCovers after level ell to a checkpoint file.
+    Only the non-empty cells of the level-tagged table g are written.
+    """
+    state = {"w": tuple(w), "M": M, "ell": ell, "g": {jk: g[jk] for jk in g if len(g[jk]) > 0}, "frontier": frontier}
+    temp_name = "%s.tmp"%filename
+    with gz.open(temp_name, "wb") as f:
+        pkl.dump(state, f, pkl.HIGHEST_PROTOCOL)
+    os.replace(temp_name, filename)
+
+def _loadCheckpoint(filename, w, M):
+    """
+    Load the state of singletonSubCovers from a checkpoint file saved by _saveCheckpoint.
+    Raises ValueError if the checkpoint was saved for a different w or M.
+    Outputs:
+        ell: The last level completed.
+        g: The level-tagged table of singleton sub-covers.
+        frontier: The covers new at level ell.
+    """
+    with gz.open(filename, "rb") as f:
+        state = pkl.load(f)
+    if state["w"] != tuple(w) or state["M"] != M:
+        raise ValueError("Checkpoint %s was saved for a different observed sequence or M"%filename)
+    N = len(w)
+    g = {(j,k): {} for (j,k) in itr.combinations(range(N+1),2)}
+    g.update(state["g"])
+    return state["ell"], g, state["frontier"]
+
+def _combineCovers(uvdt):
+    """
+    Combines a sequence of covers of contiguous subsequences into the child sequence of their parents.
+    Inputs:
+        uvdt: a tuple of (u, v, d_min, d_max, ts) covers, as stored in g.
+    Outputs:
+        u: the tuple of the covers' roots, to be passed to causes.
+        d_min, d_max, ts: the minimum depth, maximum depth and tree size of any cover caused by u.
+    """
+    u = tuple(u for (u,_,_,_,_) in uvdt)
+    d_min = min(d for (_,_,d,_,_) in uvdt) + 1
+    d_max = max(d for (_,_,_,d,_) in uvdt) + 1
+    ts = sum(s for (_,_,_,_,s) in uvdt) + 1
+    return u, d_min, d_max, ts
+
+def _expandLevel(causes, g, old, frontier, N, M, firsts, deadline, signatures=None, index=None):
+    """
+    Expands one seminaive level of singletonSubCovers, restricted to the combinations whose first cover is in the given cells.
+    Inputs:
+        causes, g, old, frontier, N, M: as in singletonSubCovers.
+        firsts: the (j,k1) indices of the cells g[j,k1] that the first covers of the combinations are taken from,
+            or None for every combination.
+        deadline: the Deadline of singletonSubCovers.
+        signatures: the _Signatures of the causal relation, or None.
+        index: the _frontierIndex of the level, if already built (e.g., to expand several chunks of a level).
+    Outputs:
+        finished: True if the level was fully expanded, False if it timed out.
+        new_covers: new_covers[j,k] is the set of covers of w[j:k] found at this level and not already in g.
+        num_tuples: The number of child sequences passed to causes.
+    """
+    if index is None: index = _frontierIndex(g, old, frontier, N, signatures)
+    new_covers = {}
+    num_tuples = 0
+    for m in range(1,M+1):
+        if signatures is not None and m not in signatures.lengths: continue
+        for (k, cells) in _frontierCombinations(index, m, firsts, signatures):
+            for uvdt in itr.product(*cells):
+                if deadline.check():
+                    return False, new_covers, num_tuples
+                num_tuples += 1
+                u, d_min, d_max, ts = _combineCovers(uvdt)
+                for cu in causes(u):
+                    uvdt_new = (cu, u, d_min, d_max, ts)
+                    if uvdt_new not in g[k[0],k[m]]:
+                        new_covers.setdefault((k[0],k[m]), set()).add(uvdt_new)
+    return True, new_covers, num_tuples
+
+class _LevelPool(object):
+    """
+    The worker processes that expand the levels of singletonSubCovers when workers > 1.
+    The processes are started once, each with its own copy of the table, and kept for the whole fixpoint.
+    Before each level, the covers new at the previous level are sent to every process, which commits them to its table,
+    so the table is never shipped again.  The level is split into tasks, one per cell g[j,k1] that the first cover of a
+    combination is taken from, which are grouped into chunks of roughly equal estimated cost and handed out largest first.
+    Where available, the processes are forked so that causes and the table do not need to be pickled.
+    """
+    def __init__(self, causes, g, N, M, workers, stats=None, signatures=None):
+        context = _mpContext()
+        self.g, self.N, self.workers = g, N, workers
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.levels = []
+        self.processes = []
+        for _ in range(workers):
+            conn, child_conn = context.Pipe(duplex=False)
+            p = context.Process(target=_levelWorker, args=(causes, g, N, M, stats, signatures, conn, self.tasks, self.results))
+            p.daemon = True
+            p.start()
+            self.levels.append(child_conn)
+            self.processes.append(p)
+    def expand(self, ell, g, frontier, timeout):
+        """
+        Expands level ell, as _expandLevel does, in timeout seconds.
+        Outputs are as in _expandLevel, followed by the number of calls to causes counted in the workers.
+        If the timeout passes before every worker has reported, the level is unfinished.
+        Raises RuntimeError if a worker fails or dies.
+        """
+        stop_time = time.perf_counter() + timeout
+        for conn in self.levels: conn.send((ell, frontier, timeout))
+        for chunk in self._chunks(g): self.tasks.put(chunk)
+        for _ in range(self.workers): self.tasks.put(None)
+        finished, new_covers, num_tuples, num_calls = True, {}, 0, 0
+        reported = 0
+        while reported < self.workers:
+            try:
+                result = self.results.get(timeout=max(0, min(_POLL_INTERVAL, stop_time-time.perf_counter())))
+            except qu.Empty:
+                # a worker that died (e.g., killed by the OS) will never report, so check on every wakeup
+                for p in self.processes:
+                    if not p.is_alive():
+                        raise RuntimeError("singletonSubCovers worker died at level %d with exit code %s"%(ell, p.exitcode))
+                if time.perf_counter() >= stop_time: return False, new_covers, num_tuples, num_calls
+                continue
+            reported += 1
+            if result[0] == "error":
+                raise RuntimeError("singletonSubCovers worker failed at level %d:\n%s"%(ell, result[1]))
+            _, finished_p, new_covers_p, num_tuples_p, num_calls_p = result
+            finished = finished and finished_p
+            num_tuples += num_tuples_p
+            num_calls += num_calls_p
+            for jk in new_covers_p:
+                new_covers.setdefault(jk, set()).update(new_covers_p[jk])
+        return finished, new_covers, num_tuples, num_calls
+    def _chunks(self, g):
+        """
+        Groups the tasks (j,k1) of a level into chunks of roughly equal estimated cost, largest first.
+        The cost of a task is estimated as the number of covers in g[j,k1] times one more than the number of covers
+        in the cells that start at k1, which the rest of its combinations are taken from.
+        There are about 4 chunks per worker, so that chunks finishing at different times still balance out.
+        """
+        N = self.N
+        following = [0]*(N+1) # following[k]: the number of covers in the cells g[k,k'] that start at k
+        for (j,k) in g: following[j] += len(g[j,k])
+        costs = sorted(((len(g[j,k1])*(1 + following[k1]), (j,k1)) for (j,k1) in g if len(g[j,k1]) > 0), reverse=True)
+        target = sum(cost for (cost, _) in costs) / (4.0*self.workers)
+        chunks, chunk, chunk_cost = [], [], 0
+        for (cost, jk) in costs:
+            chunk.append(jk)
+            chunk_cost += cost
+            if chunk_cost >= target:
+                chunks.append(chunk)
+                chunk, chunk_cost = [], 0
+        if len(chunk) > 0: chunks.append(chunk)
+        return chunks
+    def close(self):
+        for p in self.processes: p.terminate()
+        for p in self.processes: p.join()
+        for conn in self.levels: conn.close()
+
+def _levelWorker(causes, g, N, M, stats, signatures, conn, tasks, results):
+    """
+    Worker process of _LevelPool.
+    For each level, receives (ell, frontier, timeout) over conn, commits the frontier to its copy of g,
+    indexes the level once, and expands the chunks of tasks it takes from tasks until it takes None.
+    Then puts ("done", finished, new_covers, num_tuples, num_calls) on results, or ("error", traceback) if expansion fails.
+    Once a level times out, its remaining chunks are skipped.
+    """
+    while True:
+        ell, frontier, timeout = conn.recv()
+        try:
+            for jk in frontier:
+                for uvdt in frontier[jk]:
+                    g[jk][uvdt] = ell-1
+            old = _oldCovers(g, frontier, ell)
+            index = _frontierIndex(g, old, frontier, N, signatures)
+            deadline = Deadline(timeout)
+            # stats is this process's copy, so the calls it counts are sent back with the results
+            calls_start = 0 if stats is None else stats.causes_calls
+            finished, new_covers, num_tuples = True, {}, 0
+            for chunk in iter(tasks.get, None):
+                if not finished: continue
+                finished, new_covers_c, num_tuples_c = _expandLevel(causes, g, old, frontier, N, M, chunk, deadline, signatures, index)
+                num_tuples += num_tuples_c
+                for jk in new_covers_c:
+                    new_covers.setdefault(jk, set()).update(new_covers_c[jk])
+            num_calls = 0 if stats is None else stats.causes_calls - calls_start
+            results.put(("done", finished, new_covers, num_tuples, num_calls))
+        except Exception:
+            results.put(("error", tb.format_exc()))
+
+def _frontierIndex(g, old, frontier, N, signatures=None):
+    """
+    Indexes the cells of a seminaive level for _frontierCombinations.
+    Inputs:
+        g, old, frontier: the full, old, and frontier tables of singletonSubCovers.
+        N: the length of the observed sequence.
+        signatures: if given, the _Signatures of the causal relation, by which each cell is split.
+    Outputs:
+        index: (old_ends, frontier_ends, all_ends, old_groups, frontier_groups, all_groups), where
+            ends[j] lists the end indices k > j for which each table has covers of w[j:k], and
+            groups[j,k] lists the (task name, covers) pairs that split each cell, or the whole cell without a name.
+    """
+    old_ends = [[] for _ in range(N+1)]
+    frontier_ends = [[] for _ in range(N+1)]
+    all_ends = [[] for _ in range(N+1)]
+    for (j,k) in sorted(g):
+        if (j,k) in old: old_ends[j].append(k)
+        if (j,k) in frontier: frontier_ends[j].append(k)
+        if len(g[j,k]) > 0: all_ends[j].append(k)
+    if signatures is None:
+        group = lambda table: {jk: [(None, table[jk])] for jk in table}
+    else:
+        group = signatures.group
+    old_groups, frontier_groups = group(old), group(frontier)
+    all_groups = group({(j,k): g[j,k] for j in range(N+1) for k in all_ends[j]})
+    return old_ends, frontier_ends, all_ends, old_groups, frontier_groups, all_groups
+
+def _frontierCombinations(index, m, firsts=None, signatures=None):
+    """
+    A python generator over the m-length combinations that can produce new covers in a seminaive level.
+    Each such combination has a first frontier entry at some position i:
+    earlier positions are old covers, later positions are any covers.
+    Inputs:
+        index: the level's cells, as indexed by _frontierIndex.
+        m: the number of covers in each combination.
+        firsts: if given, only combinations with (k[0],k[1]) in firsts are generated.
+        signatures: if given, the _Signatures that index was split by.
+            Only combinations whose task names are a signature are generated.
+    Outputs:
+        (k, cells): the indices k[0] < ... < k[m] of the combination,
+            and the lists of covers to choose from at each position.
+    """
+    old_ends, frontier_ends, all_ends, old_groups, frontier_groups, all_groups = index
+    N = len(all_ends)-1
+    if firsts is None:
+        starts = range(N+1)
+    else:
+        firsts = set(firsts)
+        starts = set(j for (j,_) in firsts)
+    stack = [((j,), [], False, ()) for j in sorted(starts, reverse=True)]
+    while len(stack) > 0:
+        k, cells, in_frontier, names = stack.pop()
+        if len(cells) == m:
+            if in_frontier and (signatures is None or names in signatures.complete): yield k, cells
+            continue
+        j = k[-1]
+        # reversed so that the stack pops shorter spans first
+        if in_frontier:
+            extensions = [(k1, all_groups[j,k1], True) for k1 in reversed(all_ends[j])]
+        else:
+            extensions = [(k1, frontier_groups[j,k1], True) for k1 in reversed(frontier_ends[j])]
+            extensions += [(k1, old_groups[j,k1], False) for k1 in reversed(old_ends[j])]
+        for (k1, groups, in_frontier1) in extensions:
+            if firsts is not None and len(k) == 1 and (j,k1) not in firsts: continue
+            for (name, covers) in groups:
+                if signatures is None or names+(name,) in signatures.prefixes:
+                    stack.append((k+(k1,), cells+[covers], in_frontier1, names+(name,)))
+
+def _naiveSingletonSubCovers(causes, M, w, verbose=False, timeout=300, progress=None, stats=None):
+    """
+    Reference implementation of singletonSubCovers that recomputes every level from scratch.
+    Same inputs and outputs as singletonSubCovers.
+    """
+    deadline = _deadline(timeout)
     # Initialize g
     N = len(w)
-    g = [{(j,k): set() for (j,k) in itr.combinations(range(N+1),2)}]
+    g_prev = {(j,k): set() for (j,k) in itr.combinations(range(N+1),2)}
     for j in range(N):
-        g[0][j,j+1] =  set([(w[j], (), 0, 0, 1)]) # 0-based indexing into w
+        g_prev[j,j+1] =  set([(w[j], (), 0, 0, 1)]) # 0-based indexing into w
     for ell in itr.count(1):
-        g.append({(j,k): set(g[ell-1][j,k]) for (j,k) in g[ell-1]}) # copy (ell-1) covers
+        g = {(j,k): set(g_prev[j,k]) for (j,k) in g_prev} # copy (ell-1) covers
+        num_new = {} # change counter: the level is a fixpoint iff no cell gains a cover
+        if stats is not None: started = stats._startLevel()
+        num_tuples = 0
         for m in range(1,M+1):
             for k in itr.combinations(range(N+1),m+1):
-                for uvdt in itr.product(*[g[ell-1][k[i-1],k[i]] for i in range(1,m+1)]):
-                    if time.clock()-start > timeout:
-                        return False, g[ell]
-                    u = tuple(u for (u,_,_,_,_) in uvdt)
-                    d_min = min(d for (_,_,d,_,_) in uvdt) + 1
-                    d_max = max(d for (_,_,_,d,_) in uvdt) + 1
-                    ts = sum(s for (_,_,_,_,s) in uvdt) + 1
-                    g[ell][k[0],k[m]] |= set((cu, u, d_min, d_max, ts) for cu in causes(u))
+                for uvdt in itr.product(*[g_prev[k[i-1],k[i]] for i in range(1,m+1)]):
+                    if deadline.check():
+                        if stats is not None: stats._recordLevel(ell, started, num_tuples, sum(num_new.values()), (len(g[jk]) for jk in g))
+                        return False, g
+                    num_tuples += 1
+                    u, d_min, d_max, ts = _combineCovers(uvdt)
+                    for cu in causes(u):
+                        if (cu, u, d_min, d_max, ts) not in g[k[0],k[m]]:
+                            g[k[0],k[m]].add((cu, u, d_min, d_max, ts))
+                            num_new[k[0],k[m]] = num_new.get((k[0],k[m]), 0) + 1
+        if stats is not None:
+            stats._recordLevel(ell, started, num_tuples, sum(num_new.values()), (len(g[jk]) for jk in g))
+        if progress is not None:
+            progress(ell, num_new)
         if verbose:
-            print("ell=%d, max |g| = %d"%(ell, max([len(g[ell][jk]) for jk in g[ell]])))
-        if g[ell]==g[ell-1]:
-            return True, g[ell]
+            print("ell=%d, max |g| = %d"%(ell, max([len(g[jk]) for jk in g])))
+        if len(num_new) == 0:
+            return True, g
+        g_prev = g
+
+def _subCoverSets(g, new_covers=None):
+    """
+    Converts the level-tagged sub-cover table used internally by singletonSubCovers
+    into the table of sets that it returns, merging in any covers not yet committed.
+    """
+    if new_covers is None: new_covers = {}
+    return {jk: set(g[jk]) | new_covers.get(jk, set()) for jk in g}
 
 def topLevelCovers(g, N, M, u=(), k=(0,), d_min=(), d_max=(), ts=()):
     """
@@ -59,17 +636,257 @@ def topLevelCovers(g, N, M, u=(), k=(0,), d_min=(), d_max=(), ts=()):
             d_max[i] is the longest causal chain length in u[i]'s covering tree,
             ts[i] is the total number of nodes in u[i]'s covering tree.
     """
+    ends, forbidden = _topLevelIndex(g, N)
+    for t in _topLevelCovers(g, ends, forbidden, N, M, u, k, d_min, d_max, ts):
+        yield t
+
+def _topLevelIndex(g, N):
+    """
+    Index the table of singleton sub-covers for top-level cover enumeration.
+    Inputs:
+        g: the table of singleton sub-covers as returned by singletonSubCovers.
+        N: the length of the observed sequence.
+    Outputs:
+        ends: ends[j] is the ascending list of k for which g[j,k] is non-empty.
+        forbidden: forbidden[j,k] is the set of non-empty child sequences v in g[j,k] (omitted if there are none).
+            A cover whose roots over w[j:k] form one of these sequences is not top-level.
+    """
+    ends = [[] for _ in range(N+1)]
+    forbidden = {}
+    for (j,k) in sorted(g):
+        if len(g[j,k]) == 0: continue
+        ends[j].append(k)
+        vs = set(v for (_,v,_,_,_) in g[j,k] if len(v) > 0)
+        if len(vs) > 0: forbidden[j,k] = vs
+    return ends, forbidden
+
+def _topLevelCovers(g, ends, forbidden, N, M, u, k, d_min, d_max, ts, cost=None, remaining=None, limit=None, deadline=None):
+    """
+    Iterative helper for topLevelCovers over an index built by _topLevelIndex.
+    The search keeps an explicit stack of frames [node, candidates, i], where
+        node = (parent, edge, u_tail, k_tail, c) shares its cover prefix with its parent node,
+        edge = (k1, u1, d1_min, d1_max, ts1) is the root that node appends to its parent's prefix,
+        u_tail, k_tail are the last M-1 roots and last M indices of the prefix (all the top-level check needs),
+        c is the cost of the prefix when the search is bounded (see below),
+        candidates are the edges that can extend node, and i is the next one to try.
+    The five cover tuples are only built when a complete cover is yielded.
+    If cost is given, the search is bounded for branch-and-bound (see bestTLCovers):
+        cost(edge) is the cost of adding edge's root to a cover,
+        remaining[j] is a lower bound on the cost of covering w[j:N],
+        limit[0] is the largest total cost to search for; the caller may lower it between yields.
+    If deadline is given, it is checked on every frame expanded, and the search yields None and stops once it has passed.
+    """
     if k[-1]==N:
         yield (u, k, d_min, d_max, ts)
+        return
+    # edges[j]: every (k1, u1, d1_min, d1_max, ts1) with (u1,...) in g[j,k1], in enumeration order
+    edges = [[(k1, u1, d1_min, d1_max, ts1) for k1 in ends[j] for (u1,_,d1_min,d1_max,ts1) in g[j,k1]] for j in range(N+1)]
+    root = (None, None, u[max(0,len(u)-M+1):], k[-M:], 0)
+    frames = [[root, edges[k[-1]], 0]]
+    while len(frames) > 0:
+        if deadline is not None and deadline.check():
+            yield None
+            return
+        frame = frames[-1]
+        node, candidates, i = frame
+        if i == len(candidates):
+            frames.pop()
+            continue
+        frame[2] = i+1
+        edge = candidates[i]
+        k1, u1 = edge[0], edge[1]
+        _, _, u_tail, k_tail, c = node
+        if cost is not None:
+            c += cost(edge)
+            if c + remaining[k1] > limit[0]: continue
+        u_ext = u_tail + (u1,)
+        redundant = False
+        for m in range(1,len(k_tail)+1):
+            vs = forbidden.get((k_tail[-m],k1))
+            if vs is not None and u_ext[-m:] in vs:
+                redundant = True
+                break
+        if redundant: continue
+        child = (node, edge, u_ext[max(0,len(u_ext)-M+1):], (k_tail+(k1,))[-M:], c)
+        if k1==N:
+            yield _materializeCover(child, u, k, d_min, d_max, ts)
+        else:
+            frames.append([child, edges[k1], 0])
+
+def parallelTopLevelCovers(g, N, M, workers, ordered=True, batch_size=256, queue_size=64):
+    """
+    A python generator that yields all top-level covers for an observed sequence, enumerated by a pool of worker processes.
+    Each first root (u1, k1) in g[0,k1] starts an independent subtree of topLevelCovers' search.
+    The subtrees are handed out to the workers, which stream their covers back in batches through a bounded queue.
+    Closing the generator (or dropping it) stops the workers.
+    Inputs:
+        g, N, M: as in topLevelCovers.
+        workers: the number of worker processes.
+        ordered: if True, covers are yielded in the same order as topLevelCovers;
+            otherwise each batch is yielded as soon as it arrives.
+        batch_size: the number of covers sent back at a time.
+        queue_size: the maximum number of batches waiting to be yielded
+            (if ordered, split between one queue per worker, so that workers cannot run ahead of the covers yielded).
+    Outputs:
+        t: a top-level cover, as in topLevelCovers.
+    """
+    for t in _parallelTopLevelCovers(g, N, M, workers, ordered, batch_size, queue_size):
+        yield t
+
+def _parallelTopLevelCovers(g, N, M, workers, ordered=True, batch_size=256, queue_size=64, timeout=None):
+    """
+    Helper for parallelTopLevelCovers, which yields None and stops if no batch arrives within timeout seconds of starting.
+    Raises RuntimeError if a worker fails or dies.
+    If ordered, subtree i streams its batches through its own bounded queue results[i % workers],
+    and subtree i+workers is only handed out once subtree i has been consumed,
+    so no worker gets more than workers subtrees ahead of the covers being yielded.
+    """
+    if timeout is not None: stop_time = time.perf_counter() + timeout
+    ends, forbidden = _topLevelIndex(g, N)
+    num_subtrees = sum(len(g[0,k1]) for k1 in ends[0])
+    context = _mpContext()
+    tasks = context.Queue()
+    # stops: the number of None tasks put, after which workers exit
+    if ordered:
+        results = [context.Queue(maxsize=max(1, queue_size//workers)) for _ in range(workers)]
+        for i in range(min(workers, num_subtrees)): tasks.put(i)
+        stops = max(0, workers-num_subtrees)
     else:
-        for k1 in range(k[-1]+1,N+1):
-            for (u1,_,d1_min, d1_max, ts1) in g[k[-1],k1]:
-                if any([(u+(u1,))[-m:] == v for m in range(1,min(len(k),M)+1) for (_,v,_,_,_) in g[k[-m],k1]]):
-                    continue
-                for t in topLevelCovers(g, N, M, u+(u1,), k+(k1,), d_min+(d1_min,), d_max+(d1_max,), ts+(ts1,)):
-                    yield t
+        results = [context.Queue(maxsize=queue_size)]
+        for i in range(num_subtrees): tasks.put(i)
+        stops = workers
+    for _ in range(stops): tasks.put(None)
+    processes = [context.Process(target=_topLevelWorker, args=(g, ends, forbidden, N, M, tasks, results, batch_size)) for _ in range(workers)]
+    for p in processes:
+        p.daemon = True
+        p.start()
+    try:
+        # next_i: the next subtree to yield, done: the number of finished subtrees
+        next_i, done = 0, 0
+        while done < num_subtrees:
+            queue = results[next_i % workers] if ordered else results[0]
+            try:
+                wait_time = _POLL_INTERVAL if timeout is None else max(0, min(_POLL_INTERVAL, stop_time-time.perf_counter()))
+                kind, i, batch = queue.get(timeout=wait_time)
+            except qu.Empty:
+                # a worker that died will never send its batches, so check on every wakeup
+                _checkWorkers(processes, "parallelTopLevelCovers", stops, queue)
+                if timeout is not None and time.perf_counter() >= stop_time:
+                    yield None
+                    return
+                continue
+            if kind == "error":
+                raise RuntimeError("parallelTopLevelCovers worker failed on subtree %s:\n%s"%(i, batch))
+            for t in batch: yield t
+            if kind == "done":
+                done += 1
+                if ordered:
+                    # subtree next_i has been consumed, so its queue can take the subtree workers ahead
+                    if next_i + workers < num_subtrees:
+                        tasks.put(next_i + workers)
+                    else:
+                        tasks.put(None)
+                        stops += 1
+                    next_i += 1
+    finally:
+        for p in processes: p.terminate()
+        for p in processes: p.join()
+
+def _topLevelWorker(g, ends, forbidden, N, M, tasks, results, batch_size):
+    """
+    Worker process of parallelTopLevelCovers.
+    Enumerates the subtree of each first root index taken from tasks until it takes None, and puts
+    ("covers", i, batch) and finally ("done", i, batch) on results[i % len(results)] for each subtree i,
+    or ("error", i, traceback) if the enumeration fails.
+    """
+    firsts = [(k1, u1, d1_min, d1_max, ts1) for k1 in ends[0] for (u1,_,d1_min,d1_max,ts1) in g[0,k1]]
+    i = None
+    try:
+        for i in iter(tasks.get, None):
+            k1, u1, d1_min, d1_max, ts1 = firsts[i]
+            queue = results[i % len(results)]
+            batch = []
+            vs = forbidden.get((0,k1))
+            if vs is None or (u1,) not in vs:
+                for t in _topLevelCovers(g, ends, forbidden, N, M, (u1,), (0,k1), (d1_min,), (d1_max,), (ts1,)):
+                    batch.append(t)
+                    if len(batch) == batch_size:
+                        queue.put(("covers", i, batch))
+                        batch = []
+            queue.put(("done", i, batch))
+    except BaseException:
+        # including SystemExit, so that a worker never stops without a word
+        results[(i or 0) % len(results)].put(("error", i, tb.format_exc()))
+
+def _materializeCover(node, u, k, d_min, d_max, ts):
+    """
+    Build the (u, k, d_min, d_max, ts) tuples of a complete cover from its node in _topLevelCovers.
+    u, k, d_min, d_max, ts are the accumulators the search started from.
+    """
+    path = []
+    while node[0] is not None:
+        path.append(node[1])
+        node = node[0]
+    path.reverse()
+    k_path, u_path, d_min_path, d_max_path, ts_path = zip(*path)
+    return (u+u_path, k+k_path, d_min+d_min_path, d_max+d_max_path, ts+ts_path)
+
+def bestTLCovers(g, N, M, criterion="mc"):
+    """
+    Finds the minimum cardinality or minimum forest size top-level covers by branch-and-bound,
+    without enumerating the other top-level covers.
+    Covers are paths from 0 to N over the cells of g, so the cheapest way to cover each suffix w[j:N],
+    ignoring the top-level constraint, is a shortest path that lower-bounds every extension of a partial cover.
+    Partial covers whose cost plus this bound exceeds the best cost found are pruned.
+    For minimum cardinality the bound from 0 is always attained by a top-level cover,
+    so only optimal paths are searched.
+    Inputs:
+        g: the table of singleton sub-covers as returned by singletonSubCovers.
+        N: the length of the observed sequence.
+        M: The upper bound on the length of any effect sequence in the causal relation.
+        criterion: "mc" for minimum cardinality or "fsn" for minimum forest size.
+    Outputs:
+        tlcovs_best: The optimal top-level covers, in the order topLevelCovers yields them.
+        extremum: The optimal cardinality or forest size, or None if there are no top-level covers.
+    """
+    tlcovs_best, extremum, _ = _bestTLCovers(g, N, M, criterion)
+    return tlcovs_best, extremum
+
+def _bestTLCovers(g, N, M, criterion, deadline=None):
+    """
+    Helper for bestTLCovers, which stops searching once deadline (if given) has passed.
+    Returns (tlcovs_best, extremum, finished), where finished is False if the deadline stopped the search;
+    tlcovs_best and extremum are then the best top-level covers found so far, which may not be optimal.
+    """
+    if criterion == "mc": cost = lambda edge: 1
+    elif criterion == "fsn": cost = lambda edge: edge[4]
+    else: raise ValueError("bestTLCovers does not support criterion: %s"%criterion)
+    ends, forbidden = _topLevelIndex(g, N)
+    # remaining[j]: the cheapest cost of any cover of w[j:N], top-level or not
+    inf = float("inf")
+    remaining = [inf]*N + [0]
+    for j in range(N-1,-1,-1):
+        for k1 in ends[j]:
+            for (u1,_,d1_min,d1_max,ts1) in g[j,k1]:
+                remaining[j] = min(remaining[j], cost((k1,u1,d1_min,d1_max,ts1)) + remaining[k1])
+    # w[0:N] cannot be covered at all, so there is nothing to search
+    if remaining[0] == inf: return [], None, True
+    limits = [remaining[0], inf] if criterion == "mc" else [inf]
+    for limit in limits:
+        tlcovs_best, extremum = [], None
+        bound = [limit]
+        for t in _topLevelCovers(g, ends, forbidden, N, M, (), (0,), (), (), (), cost=cost, remaining=remaining, limit=bound, deadline=deadline):
+            if t is None: return tlcovs_best, extremum, False
+            value = len(t[0]) if criterion == "mc" else sum(t[4])
+            if extremum is None or value < extremum:
+                tlcovs_best, extremum = [t], value
+                bound[0] = value
+            elif value == extremum:
+                tlcovs_best.append(t)
+        if extremum is not None: break
+    return tlcovs_best, extremum, True
 
-def explain(causes, w, M=None, verbose=False, timeout=600, max_tlcovs=13000000):
+def explain(causes, w, M=None, verbose=False, timeout=600, max_tlcovs=13000000, strategy="seminaive", cache_size=65536, intern=True, progress=None, workers=1, ordered=True, checkpoint=None, resume_from=None, stats=None, signatures=None):
     """
     Computes all explanations (top-level covers) for an observed sequence.
     Inputs:
@@ -77,31 +894,396 @@ def explain(causes, w, M=None, verbose=False, timeout=600, max_tlcovs=13000000):
         w: The observed sequence to be explained.
         M: The upper bound on the length of any effect sequence in the causal relation.
         verbose: Boolean flag for whether to print out status updates.
-        timeout: The maximum number of seconds to allow explain to run.
+        timeout: The maximum number of seconds to allow explain to run, or a Deadline.
         max_tlcovs: The maximum number of top-level covers to enumerate.
+        strategy: The fixpoint strategy used by singletonSubCovers ("seminaive" or "naive").
+        cache_size: The maximum size of the LRU cache placed in front of causes (see cached_causes).
+            Use 0 to call causes directly.  Ignored if causes is already a CachedCauses instance.
+        intern: Boolean flag for whether to run the algorithm on integer ids of the causes and effects (see _SymbolTable).
+            The outputs are the same either way.
+        progress: Optional per-level callback passed on to singletonSubCovers.
+        workers: The number of processes used by singletonSubCovers (see singletonSubCovers).
+            If workers > 1, the top-level covers are also enumerated by that many processes (see parallelTopLevelCovers).
+            Interning is skipped when workers > 1, since each process would assign its own ids.
+        ordered: Boolean flag for whether top-level covers enumerated by several workers keep the order of topLevelCovers.
+        checkpoint, resume_from: Optional checkpoint file names for singletonSubCovers (see singletonSubCovers).
+            Interning is skipped when either is given, so that checkpoints hold the original elements.
+        stats: Optional ExplainStats that is filled in with profiling counters (see ExplainStats).
+        signatures: Optional task name sequences of the rules of the causal relation (see singletonSubCovers).
+            Defaults to causes.signatures if causes has that attribute.
     Outputs:
         status: String indicating exit status: "Success", "SS covers timed out", "TL covers timed out", or "TL covers maxed out".
         tlcovs: A list of top-level covers as generated by topLevelCovers.
         g: The table of singleton sub-covers
     """
+    tlcovs = []
+    status, g = _explain(causes, w, M, tlcovs.append, verbose, timeout, max_tlcovs, strategy, cache_size, intern, progress, workers, ordered, checkpoint, resume_from, stats, signatures)
+    return status, tlcovs, g
+
+def explain_many(causes, demos, M=None, workers=None, timeout=600, grace=10, reducer=None, return_g=False, **kwargs):
+    """
+    A python generator that runs explain on many observed sequences in a pool of worker processes.
+    Each sequence is explained in its own process, longest sequences first for load balance,
+    and results are yielded as soon as each one completes.
+    Inputs:
+        causes: A handle to the causes function.
+        demos: A list of observed sequences, or a dictionary mapping sample keys to observed sequences.
+        M: As in explain.
+        workers: The number of sequences explained at once (defaults to the number of CPUs).
+        timeout: The timeout passed to explain for each sequence.
+            A process still running grace seconds after its timeout is killed.
+        reducer: If given, reducer(key, status, tlcovs, run_time) is called in the worker process on the result of explain,
+            where run_time is the time spent in explain, and only its return value is sent back in place of tlcovs.
+            This keeps the (possibly very many) top-level covers out of the parent process.
+        return_g: If False, the table of singleton sub-covers is not sent back, and g is empty.
+        kwargs: Any other keyword arguments of explain (e.g., verbose, max_tlcovs).
+    Outputs:
+        (key, status, tlcovs, g, run_time) for each observed sequence, where
+            key is its index in demos (or its key if demos is a dictionary),
+            status, tlcovs, g are as returned by explain, except that status is "Killed" (and tlcovs and g are empty)
+                if the process was killed or died before returning,
+            tlcovs is the value returned by reducer if one is given (or None if the process was killed),
+            run_time is the wall clock time in seconds spent on the sequence.
+    """
+    if workers is None: workers = mp.cpu_count()
+    if hasattr(demos, "items"): samples = list(demos.items())
+    else: samples = list(enumerate(demos))
+    samples.sort(key=lambda sample: len(sample[1]), reverse=True)
+    context = _mpContext()
+    # running[conn]: (key, process, kill time, start time) of the sample whose result will arrive on conn
+    running = {}
+    next_sample = 0
+    try:
+        while next_sample < len(samples) or len(running) > 0:
+            while next_sample < len(samples) and len(running) < workers:
+                key, w = samples[next_sample]
+                next_sample += 1
+                conn, child_conn = context.Pipe(duplex=False)
+                p = context.Process(target=_explainWorker, args=(causes, key, w, M, timeout, reducer, return_g, kwargs, child_conn))
+                p.daemon = True
+                p.start()
+                child_conn.close()
+                start_time = time.perf_counter()
+                running[conn] = (key, p, start_time + timeout + grace, start_time)
+            wait_time = max(0, min(kill_time for (_,_,kill_time,_) in running.values()) - time.perf_counter())
+            for conn in mpc.wait(list(running), timeout=wait_time):
+                key, p, _, start_time = running.pop(conn)
+                try:
+                    succeeded, result = conn.recv()
+                except EOFError:
+                    succeeded, result = True, ("Killed", [] if reducer is None else None, {})
+                conn.close()
+                p.join()
+                if not succeeded:
+                    raise RuntimeError("explain_many worker failed on sample %s:\n%s"%(key, result))
+                status, tlcovs, g = result
+                yield key, status, tlcovs, g, time.perf_counter()-start_time
+            now = time.perf_counter()
+            for conn in [conn for conn in running if running[conn][2] <= now]:
+                key, p, _, start_time = running.pop(conn)
+                p.terminate()
+                p.join()
+                conn.close()
+                yield key, "Killed", [] if reducer is None else None, {}, now-start_time
+    finally:
+        for conn in running:
+            running[conn][1].terminate()
+            running[conn][1].join()
+            conn.close()
+
+def _explainWorker(causes, key, w, M, timeout, reducer, return_g, kwargs, conn):
+    """
+    Worker process of explain_many.
+    Sends (True, (status, tlcovs, g)) from explain over conn, or (False, traceback) if explain or reducer fails.
+    tlcovs is replaced by reducer(key, status, tlcovs, run_time) if reducer is given, and g by {} unless return_g is True.
+    """
+    try:
+        start_time = time.perf_counter()
+        status, tlcovs, g = explain(causes, w, M=M, timeout=timeout, **kwargs)
+        if reducer is not None: tlcovs = reducer(key, status, tlcovs, time.perf_counter()-start_time)
+        result = (True, (status, tlcovs, g if return_g else {}))
+    except Exception:
+        result = (False, tb.format_exc())
+    conn.send(result)
+    conn.close()
+
+def _explain(causes, w, M, consume, verbose, timeout, max_tlcovs, strategy, cache_size, intern, progress, workers, ordered, checkpoint, resume_from, stats, signatures, covers=None):
+    """
+    Shared driver for explain and explain_best.
+    Builds the table of singleton sub-covers and passes each cover generated by covers(g, N, M, deadline) to consume.
+    covers is responsible for the deadline and generates a None cover if it times out.
+    By default, covers is topLevelCovers, or parallelTopLevelCovers if workers > 1.
+    Inputs and outputs are as in explain, except that consume replaces the list of top-level covers.
+    """
     if M is None: M = len(w)
+    if signatures is None: signatures = getattr(causes, "signatures", None)
+    if stats is not None and not isinstance(causes, CachedCauses): causes = stats.counted(causes)
+    intern = intern and workers == 1 and checkpoint is None and resume_from is None
+    if intern:
+        symbols = _SymbolTable()
+        causes = symbols.causes(causes)
+        w = tuple(symbols.encode(x) for x in w)
+        if signatures is not None: signatures = _Signatures(signatures, symbols)
+        consume_decoded = consume
+        consume = lambda t: consume_decoded(symbols.decodeCover(t))
+    # when interning, the cache is keyed on tuples of ids, so hits never decode or hash whole elements
+    if cache_size > 0: causes = cached_causes(causes, maxsize=cache_size)
+    cached = causes
     if verbose: print("Constructing explanations...")
-    tlcovs = []
-    start = time.clock()
-    status, g = singletonSubCovers(causes, M, w, verbose=verbose, timeout=timeout)
+    deadline = _deadline(timeout)
+    status, g = singletonSubCovers(causes, M, w, verbose=verbose, timeout=deadline, strategy=strategy, progress=progress, workers=workers, checkpoint=checkpoint, resume_from=resume_from, stats=stats, signatures=signatures)
+    if verbose and isinstance(cached, CachedCauses): print("causes cache: %s"%cached)
     if status == False:
         if verbose: print("singletonSubCovers timed out :(")
-        return "SS covers timed out", tlcovs, g
-    for t in topLevelCovers(g, len(w), M):
-        tlcovs.append(t)
-        if time.clock()-start > timeout:
-            if verbose: print("topLevelCovers timed out :(")
-            return "TL covers timed out", tlcovs, g
-        if len(tlcovs) > max_tlcovs:
-            if verbose: print("topLevelCovers maxed out :(")
-            return "TL covers maxed out", tlcovs, g
-    if verbose: print("Success!")
-    return "Success", tlcovs, g
+        status = "SS covers timed out"
+    else:
+        status = "Success"
+        num_tlcovs = 0
+        tl_start = (time.perf_counter(), time.process_time())
+        if covers is not None:
+            tlcovs = covers(g, len(w), M, deadline)
+        elif workers > 1:
+            # a None cover means that the workers produced nothing before the timeout
+            tlcovs = _parallelTopLevelCovers(g, len(w), M, workers, ordered, timeout=deadline.remaining())
+        else:
+            tlcovs = topLevelCovers(g, len(w), M)
+        for t in tlcovs:
+            if t is not None:
+                consume(t)
+                num_tlcovs += 1
+            if t is None or (covers is None and deadline.check()):
+                if verbose: print("topLevelCovers timed out :(")
+                status = "TL covers timed out"
+                break
+            if num_tlcovs > max_tlcovs:
+                if verbose: print("topLevelCovers maxed out :(")
+                status = "TL covers maxed out"
+                break
+        if hasattr(tlcovs, "close"): tlcovs.close() # stops any worker processes
+        if stats is not None:
+            stats.num_tlcovs = num_tlcovs
+            stats.tl_wall_time, stats.tl_cpu_time = time.perf_counter()-tl_start[0], time.process_time()-tl_start[1]
+        if verbose and status == "Success": print("Success!")
+    if intern: g = symbols.decodeTable(g)
+    if stats is not None:
+        stats.status = status
+        if stats.callback is not None: stats.callback(stats)
+    return status, g
+
+class _SymbolTable(object):
+    """
+    Interns the causes and effects handled by explain as small integer ids.
+    Whole elements (e.g., (state, task, parameters) triples) are interned, so the table of sub-covers and the
+    top-level covers hold tuples of integers that hash and compare in constant time.
+    Attributes:
+        ids: ids[x] is the id of element x.
+        symbols: symbols[i] is the element with id i.
+    """
+    def __init__(self):
+        self.ids = {}
+        self.symbols = []
+    def encode(self, x):
+        i = self.ids.get(x)
+        if i is None:
+            i = self.ids[x] = len(self.symbols)
+            self.symbols.append(x)
+        return i
+    def decode(self, u):
+        return tuple(map(self.symbols.__getitem__, u))
+    def causes(self, causes):
+        """
+        Wraps a causes function on elements as a causes function on ids.
+        """
+        def interned_causes(v):
+            return set(self.encode(u) for u in causes(self.decode(v)))
+        return interned_causes
+    def decodeCover(self, t):
+        u, k, d_min, d_max, ts = t
+        return (self.decode(u), k, d_min, d_max, ts)
+    def decodeTable(self, g):
+        return {jk: set((self.symbols[u], self.decode(v), d_min, d_max, ts) for (u, v, d_min, d_max, ts) in g[jk]) for jk in g}
+
+def _countParameters(u):
+    """
+    The number of distinct parameter values used by the roots of cover u (see minParametersTLCovers).
+    """
+    return len(set([param for u_ in u for param in u_[2]]))
+
+# Parsimony criteria supported by explain_best: label -> (objective of a top-level cover, min or max)
+_criteria = {
+    "mc": (lambda t: len(t[0]), min), # minimum cardinality
+    "md": (lambda t: max(t[3]), max), # maximum depth
+    "xd": (lambda t: min(t[2]), max), # minimax depth
+    "fsn": (lambda t: sum(t[4]), min), # minimum forest size
+    "fsx": (lambda t: sum(t[4]), max), # maximum forest size
+    "mp": (lambda t: _countParameters(t[0]), min), # minimum parameters
+}
+
+def explain_best(causes, w, M=None, criterion="mc", verbose=False, timeout=600, max_tlcovs=13000000, strategy="seminaive", cache_size=65536, intern=True, progress=None, workers=1, ordered=True, checkpoint=None, resume_from=None, stats=None, signatures=None):
+    """
+    Computes the most parsimonious explanations for an observed sequence without storing every top-level cover.
+    Top-level covers are streamed from topLevelCovers and only the current extremal set of each criterion is kept.
+    A single "mc" or "fsn" criterion is searched directly with bestTLCovers instead,
+    so non-optimal covers are never enumerated (or counted towards max_tlcovs).
+    Inputs:
+        criterion: A parsimony criterion label, or a list of labels, from
+            "mc": minimum cardinality (as in minCardinalityTLCovers),
+            "md": maximum depth (as in maxDepthTLCovers),
+            "xd": minimax depth (as in minimaxDepthTLCovers),
+            "fsn": minimum forest size (as in minForestSizeTLCovers),
+            "fsx": maximum forest size (as in maxForestSizeTLCovers),
+            "mp": minimum parameters (as in minParametersTLCovers).
+        causes, w, M, verbose, timeout, max_tlcovs, strategy, cache_size, intern, progress, workers, ordered, checkpoint, resume_from, stats, signatures: as in explain.
+    Outputs:
+        status: String indicating exit status, as in explain.
+            If it is not "Success", best only reflects the top-level covers enumerated before stopping.
+        best: If criterion is a single label, a pair (tlcovs_best, extremum) as returned by the matching pruning function.
+            If criterion is a list of labels, a dictionary best[label] = (tlcovs_best, extremum).
+            extremum is None and tlcovs_best is empty if no top-level covers were found.
+        g: The table of singleton sub-covers
+    """
+    labels = [criterion] if isinstance(criterion, str) else list(criterion)
+    for label in labels:
+        if label not in _criteria: raise ValueError("Unknown parsimony criterion: %s"%label)
+    best = {label: [None, []] for label in labels}
+    def consume(t):
+        for label in labels:
+            objective, better = _criteria[label]
+            value = objective(t)
+            extremum, tlcovs_best = best[label]
+            if extremum is None or (value != extremum and better(value, extremum) == value):
+                best[label] = [value, [t]]
+            elif value == extremum:
+                tlcovs_best.append(t)
+    covers = None
+    if labels == [criterion] and criterion in ("mc", "fsn"):
+        def covers(g, N, M, deadline):
+            # a None cover tells _explain that the search timed out
+            tlcovs_best, _, finished = _bestTLCovers(g, N, M, criterion, deadline)
+            return tlcovs_best if finished else tlcovs_best + [None]
+    status, g = _explain(causes, w, M, consume, verbose, timeout, max_tlcovs, strategy, cache_size, intern, progress, workers, ordered, checkpoint, resume_from, stats, signatures, covers=covers)
+    best = {label: (best[label][1], best[label][0]) for label in labels}
+    if isinstance(criterion, str): best = best[criterion]
+    return status, best, g
+
+class IncrementalExplainer(object):
+    """
+    Explains an observed sequence while it is still being observed, one action at a time.
+    The singleton sub-covers of w[j:k] only depend on w[j:k], so appending the (N+1)^{th} action
+    only adds the cells g[j,N+1] of the table, which are filled from j = N down to 0:
+    a cover of w[j:N+1] is caused by a cover in the same cell, or by covers of w[j:k1], ..., w[k_{m-1}:N+1]
+    with j < k_{m-1}, all of which are already complete.
+    The index used to enumerate top-level covers is extended the same way.
+    Attributes:
+        causes: The causes function (wrapped in an LRU cache, as in explain).
+        M: The upper bound on the length of any effect sequence in the causal relation.
+        w: The actions observed so far.
+        g: The table of singleton sub-covers of w, as returned by singletonSubCovers.
+        signatures: The _Signatures of the causal relation, or None, as in singletonSubCovers.
+    """
+    def __init__(self, causes, M, cache_size=65536, signatures=None):
+        if signatures is None: signatures = getattr(causes, "signatures", None)
+        if cache_size > 0: causes = cached_causes(causes, maxsize=cache_size)
+        self.causes = causes
+        self.M = M
+        self.w = ()
+        self.g = {}
+        self.signatures = _signatures(signatures)
+        # ends, forbidden: the index of g built by _topLevelIndex
+        self.ends = [[]]
+        self.forbidden = {}
+        # groups[j,k]: the (task name, covers) pairs of each non-empty cell, as split by signatures.group
+        self.groups = {}
+    def append(self, action, timeout=None):
+        """
+        Observe the next action and add the singleton sub-covers of every w[j:N+1] to the table.
+        Inputs:
+            action: The next observed action.
+            timeout: If given, the maximum number of seconds to spend on the action, or a Deadline.
+        Outputs:
+            status: True if the action was added, False if the timeout passed first.
+                The explainer is then left as it was before the call.
+        """
+        deadline = None if timeout is None else _deadline(timeout)
+        N = len(self.w)
+        self.w += (action,)
+        self.ends.append([])
+        for j in range(N+1):
+            self.g[j,N+1] = set()
+        self.g[N,N+1].add((action, (), 0, 0, 1))
+        lengths = range(2,self.M+1)
+        if self.signatures is not None: lengths = [m for m in lengths if m in self.signatures.lengths]
+        for j in range(N,-1,-1):
+            cell = self.g[j,N+1]
+            # causes of two or more complete cells
+            for m in lengths:
+                for cells in self._combinations(j, N+1, m):
+                    for uvdt in itr.product(*cells):
+                        if deadline is not None and deadline.check():
+                            self._truncate(N)
+                            return False
+                        u, d_min, d_max, ts = _combineCovers(uvdt)
+                        cell.update((cu, u, d_min, d_max, ts) for cu in self.causes(u))
+            # causes of single covers in the same cell, until there are no new ones
+            unexpanded = list(cell)
+            while len(unexpanded) > 0:
+                if deadline is not None and deadline.check():
+                    self._truncate(N)
+                    return False
+                (u1, _, d_min, d_max, ts) = unexpanded.pop()
+                for cu in self.causes((u1,)):
+                    uvdt_new = (cu, (u1,), d_min+1, d_max+1, ts+1)
+                    if uvdt_new not in cell:
+                        cell.add(uvdt_new)
+                        unexpanded.append(uvdt_new)
+            if len(cell) > 0:
+                self.ends[j].append(N+1)
+                vs = set(v for (_,v,_,_,_) in cell if len(v) > 0)
+                if len(vs) > 0: self.forbidden[j,N+1] = vs
+                if self.signatures is None: self.groups[j,N+1] = [(None, cell)]
+                else: self.groups[j,N+1] = self.signatures.group({(j,N+1): cell})[j,N+1]
+        return True
+    def _truncate(self, N):
+        """
+        Remove every cell ending after the N^{th} action, which undoes an interrupted append.
+        """
+        for j in range(N+1):
+            del self.g[j,N+1]
+            self.forbidden.pop((j,N+1), None)
+            self.groups.pop((j,N+1), None)
+            if len(self.ends[j]) > 0 and self.ends[j][-1] == N+1: self.ends[j].pop()
+        self.ends.pop()
+        self.w = self.w[:N]
+    def _combinations(self, j, K, m):
+        """
+        A python generator over the lists of m cells g[j,k1], ..., g[k_{m-1},K] that are all non-empty.
+        If signatures are given, each cell is split by the task names of its covers as in _frontierCombinations,
+        and only the lists whose task names are a signature are generated.
+        """
+        signatures = self.signatures
+        stack = [(j, [], ())]
+        while len(stack) > 0:
+            k, cells, names = stack.pop()
+            if len(cells) == m-1:
+                for (name, covers) in self.groups.get((k,K), ()):
+                    if signatures is None or names+(name,) in signatures.complete: yield cells + [covers]
+                continue
+            for k1 in self.ends[k]:
+                if k1 < K:
+                    for (name, covers) in self.groups[k,k1]:
+                        if signatures is None or names+(name,) in signatures.prefixes:
+                            stack.append((k1, cells + [covers], names+(name,)))
+    def topLevelCovers(self):
+        """
+        A python generator that yields all top-level covers of the actions observed so far, as in topLevelCovers.
+        """
+        for t in _topLevelCovers(self.g, self.ends, self.forbidden, len(self.w), self.M, (), (0,), (), (), ()):
+            yield t
+    def bestTLCovers(self, criterion="mc"):
+        """
+        Finds the minimum cardinality or minimum forest size top-level covers of the actions observed so far, as in bestTLCovers.
+        """
+        return bestTLCovers(self.g, len(self.w), self.M, criterion)
 
 def minCardinalityTLCovers(tlcovs):
     """
@@ -171,42 +1353,57 @@ def maxForestSizeTLCovers(tlcovs):
 def irredundantTLCovers(tlcovs, timeout=300):
     """
     Prune top-level covers for irredundancy
+    A cover is redundant if some other cover in tlcovs is a sub-sequence of it, which must be strictly longer.
+    An inverted index from each root to the covers containing it is built first, and the distinct covers are visited
+    from shortest to longest, so each cover other_u is only tested against the longer covers that contain all its roots.
+    Sets of covers are stored as bit masks over the distinct covers, so the index is intersected with integer ands.
     Inputs:
         tlcovs: A list of top-level covers as returned by explain.
-        timeout: The maximum number of seconds to allow irredundantTLCovers to run.
+        timeout: The maximum number of seconds to allow irredundantTLCovers to run, or a Deadline.
     Outputs:
         status: True if the run finished, False if it timed out.
         tlcovs_irr: The pruned top level covers.
+            If the run timed out, only the covers verified as irredundant so far
+            (those no longer than the covers being visited, which have been tested against every shorter cover).
     """
-    tlcovs_irr = []
-    start = time.clock()
-    for (u,k,d_min,d_max,ts) in tlcovs:
-        u_is_irr = True # until proven otherwise
-        for (other_u,_,_,_,_) in tlcovs:
-            if time.clock()-start > timeout:
-                return False, tlcovs_irr
-            # skip u1
-            if u==other_u: continue
-            # check if other_u is a sub-sequence of u
-            if len(other_u) > len(u):
-                is_sub_seq = False
-            else:
-                is_sub_seq = True # until proven otherwise
-                u_tail = u
-                for other_u_i in other_u:
-                    if other_u_i in u_tail:
-                        u_tail = u_tail[u_tail.index(other_u_i)+1:]
-                    else:
-                        is_sub_seq = False
-                        break
-            # other_u is a sub-sequence of u, u is redundant
-            if is_sub_seq:
-                u_is_irr = False
-                break
-        if u_is_irr:
-            tlcovs_irr.append((u,k,d_min,d_max,ts))
+    deadline = _deadline(timeout)
+    us = sorted(set(u for (u,_,_,_,_) in tlcovs), key=len) # distinct covers, shortest first
+    containing = {} # containing[root]: bit mask of the covers that include root
+    for c in range(len(us)):
+        for root in set(us[c]):
+            containing[root] = containing.get(root, 0) | (1 << c)
+    redundant = 0 # bit mask of the covers found to be redundant
+    for (length, group) in itr.groupby(range(len(us)), key=lambda c: len(us[c])):
+        # every shorter cover has been visited, so the covers of this length are verified
+        group = list(group)
+        longer = ((1 << len(us)) - 1) ^ ((1 << (group[-1]+1)) - 1) # bit mask of the strictly longer covers
+        for c in group:
+            if deadline.check():
+                redundant = _coverSet(us, redundant)
+                return False, [(u,k,d_min,d_max,ts) for (u,k,d_min,d_max,ts) in tlcovs if len(u) <= length and u not in redundant]
+            # a longer cover containing a redundant other_u also contains the shorter cover that made it redundant
+            if redundant >> c & 1: continue
+            other_u = us[c]
+            candidates = longer & ~redundant
+            for root in set(other_u):
+                candidates &= containing[root]
+            while candidates:
+                bit = candidates & -candidates
+                candidates ^= bit
+                # check if other_u is a sub-sequence of u
+                u_tail = iter(us[bit.bit_length()-1])
+                if all(other_u_i in u_tail for other_u_i in other_u):
+                    redundant |= bit
+    redundant = _coverSet(us, redundant)
+    tlcovs_irr = [(u,k,d_min,d_max,ts) for (u,k,d_min,d_max,ts) in tlcovs if u not in redundant]
     return True, tlcovs_irr
 
+def _coverSet(us, mask):
+    """
+    The set of covers us[c] whose bits are set in mask.
+    """
+    return set(us[c] for c in range(len(us)) if mask >> c & 1)
+
 def minParametersTLCovers(tlcovs):
     # def count_params(u):
     #     return len(set([param for u_ in u for param in u_[2]]))
@@ -214,3 +1411,313 @@ def minParametersTLCovers(tlcovs):
     mp = min([count_params(u) for (u,_,_,_,_) in tlcovs])
     tlcovs_mp = [(u,k,d_min,d_max,ts) for (u,k,d_min,d_max,ts) in tlcovs if count_params(u)==mp]
     return tlcovs_mp, mp
+
+def _rootIds(u, symbols, ids, ids_by_object):
+    """
+    Returns the list of the ids of the roots in u in a table of distinct roots, adding any new ones.
+    Inputs:
+        u: The roots of a top-level cover.
+        symbols: The list of distinct roots, in order of first appearance (extended in place).
+        ids: The dict from each root in symbols to its index (extended in place).
+        ids_by_object: The dict from id(root) to (index, root) of each root object seen so far (extended in place).
+    Outputs:
+        r: The list of indices of u's roots in symbols.
+    """
+    r = []
+    for u_ in u:
+        # roots are usually shared between covers, and large roots are slow to hash, so look them up by identity first
+        # (each entry keeps its root alive, so that ids are not reused while the covers are consumed)
+        i, _ = ids_by_object.get(id(u_), (None, None))
+        if i is None:
+            i = ids.get(u_)
+            if i is None:
+                i = ids[u_] = len(symbols)
+                symbols.append(u_)
+            ids_by_object[id(u_)] = (i, u_)
+        r.append(i)
+    return r
+
+class CoverSet(object):
+    """
+    A columnar representation of a list of top-level covers, for evaluating parsimony criteria with NumPy.
+    The covers are concatenated into flat arrays, with one offset per cover: cover c has the roots
+    roots[offsets[c]:offsets[c+1]], and likewise for d_min, d_max and ts, while its k has one more entry,
+    k[offsets[c]+c:offsets[c+1]+c+1].  Roots are stored as indices into a table of the distinct roots.
+    Covers are only converted back to (u, k, d_min, d_max, ts) tuples when indexed or iterated over.
+    Requires NumPy.
+    Attributes:
+        symbols: The distinct roots, in order of first appearance.
+        roots, k, d_min, d_max, ts: The flat integer arrays described above.
+        offsets: The array of offsets, with one more entry than there are covers.
+    """
+    def __init__(self, tlcovs, symbols=None, columns=None):
+        """
+        Inputs:
+            tlcovs: A list of top-level covers as returned by explain.
+            symbols, columns: internal (used to build subsets without converting covers).
+        """
+        if np is None: raise ImportError("CoverSet requires NumPy")
+        if columns is not None:
+            self.symbols = symbols
+            self.roots, self.k, self.d_min, self.d_max, self.ts, self.offsets = columns
+            return
+        self.symbols, ids, ids_by_object = [], {}, {}
+        roots, ks, d_mins, d_maxs, tss, lengths = [], [], [], [], [], [0]
+        for (u,k,d_min,d_max,ts) in tlcovs:
+            roots.extend(_rootIds(u, self.symbols, ids, ids_by_object))
+            ks.extend(k)
+            d_mins.extend(d_min)
+            d_maxs.extend(d_max)
+            tss.extend(ts)
+            lengths.append(len(u))
+        self.roots, self.k = np.array(roots, dtype=np.int64), np.array(ks, dtype=np.int64)
+        self.d_min, self.d_max, self.ts = np.array(d_mins, dtype=np.int64), np.array(d_maxs, dtype=np.int64), np.array(tss, dtype=np.int64)
+        self.offsets = np.cumsum(lengths, dtype=np.int64)
+    def __len__(self):
+        return len(self.offsets)-1
+    def __getitem__(self, c):
+        a, b = self.offsets[c], self.offsets[c+1]
+        return (tuple(self.symbols[r] for r in self.roots[a:b].tolist()), tuple(self.k[a+c:b+c+1].tolist()),
+            tuple(self.d_min[a:b].tolist()), tuple(self.d_max[a:b].tolist()), tuple(self.ts[a:b].tolist()))
+    def __iter__(self):
+        for c in range(len(self)):
+            yield self[c]
+    def lengths(self):
+        return np.diff(self.offsets)
+    def subset(self, indices):
+        """
+        Returns a CoverSet of the covers at the given indices, in that order.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        lengths = self.lengths()[indices]
+        offsets = np.zeros(len(indices)+1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # flat positions of the selected covers' entries
+        within = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+        positions = np.repeat(self.offsets[indices], lengths) + within
+        k_positions = np.repeat(self.offsets[indices] + indices, lengths+1) + np.arange(offsets[-1]+len(indices)) - np.repeat(offsets[:-1] + np.arange(len(indices)), lengths+1)
+        columns = (self.roots[positions], self.k[k_positions], self.d_min[positions], self.d_max[positions], self.ts[positions], offsets)
+        return CoverSet(None, self.symbols, columns)
+    def matches(self, u):
+        """
+        Returns a boolean array marking the covers whose roots are exactly the sequence u.
+        """
+        ids = {u_: r for (r, u_) in enumerate(self.symbols)}
+        mask = self.lengths() == len(u)
+        for (i, u_) in enumerate(u):
+            if u_ not in ids: return np.zeros(len(self), dtype=bool)
+            candidates = np.flatnonzero(mask)
+            mask[candidates] = self.roots[self.offsets[candidates]+i] == ids[u_]
+        return mask
+    def _reduce(self, ufunc, column, empty):
+        # reduce column over each cover, skipping empty covers (whose value is empty)
+        lengths = self.lengths()
+        values = np.full(len(self), empty, dtype=np.int64)
+        nonempty = lengths > 0
+        if nonempty.any(): values[nonempty] = ufunc.reduceat(column, self.offsets[:-1][nonempty])
+        return values
+    def _countParameters(self):
+        # number of distinct parameters u_[2] over the roots u_ of each cover (see minParametersTLCovers),
+        # as the popcount of the union of the roots' parameter bit masks
+        param_ids = {}
+        for u_ in self.symbols:
+            for param in u_[2]: param_ids.setdefault(param, len(param_ids))
+        num_words = max(1, (len(param_ids)+63)//64)
+        masks = np.zeros((len(self.symbols), num_words), dtype=np.uint64)
+        for (r, u_) in enumerate(self.symbols):
+            for param in u_[2]:
+                p = param_ids[param]
+                masks[r, p//64] |= np.uint64(1) << np.uint64(p%64)
+        unions = np.zeros((len(self), num_words), dtype=np.uint64)
+        nonempty = self.lengths() > 0
+        if nonempty.any(): unions[nonempty] = np.bitwise_or.reduceat(masks[self.roots], self.offsets[:-1][nonempty], axis=0)
+        return np.unpackbits(unions.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+    def objectives(self, labels=("mc", "md", "xd", "fsn", "fsx", "mp")):
+        """
+        Evaluates parsimony criteria for every cover with vectorized reductions.
+        Inputs:
+            labels: criterion labels as in explain_best.
+        Outputs:
+            values: values[label] is the array of objective values of the covers (empty covers count 0 depth).
+        """
+        values = {}
+        for label in labels:
+            if label == "mc": values[label] = self.lengths()
+            elif label == "md": values[label] = self._reduce(np.maximum, self.d_max, 0)
+            elif label == "xd": values[label] = self._reduce(np.minimum, self.d_min, 0)
+            elif label in ("fsn", "fsx"): values[label] = self._reduce(np.add, self.ts, 0)
+            elif label == "mp": values[label] = self._countParameters()
+            else: raise ValueError("Unknown parsimony criterion: %s"%label)
+        return values
+    def best(self, labels=("mc", "md", "xd", "fsn", "fsx", "mp")):
+        """
+        Prunes the covers by each parsimony criterion, as the pruning functions do.
+        Inputs:
+            labels: criterion labels as in explain_best.
+        Outputs:
+            best: best[label] = (tlcovs_best, extremum), where tlcovs_best is a CoverSet of the extremal covers.
+        """
+        best = {}
+        for (label, values) in self.objectives(labels).items():
+            extremum = int(values.max() if _criteria[label][1] is max else values.min())
+            best[label] = (self.subset(np.flatnonzero(values == extremum)), extremum)
+        return best
+
+def score_covers(tlcovs, u=None, labels=("mc", "md", "xd", "fsn", "fsx", "mp"), chunk_size=65536):
+    """
+    Evaluates parsimony criteria over top-level covers in one streaming pass, without keeping them in memory.
+    The covers are read chunk_size at a time into a CoverSet, whose objectives are evaluated with vectorized reductions,
+    and only the extremum of each criterion, the number of covers attaining it, and whether u is among them are kept.
+    Requires NumPy.
+    Inputs:
+        tlcovs: An iterable of top-level covers (e.g., a list, generator or CoverFile).
+        u: If given, a sequence of roots to look for among the covers (e.g., the correct explanation).
+        labels: criterion labels as in explain_best.
+        chunk_size: the number of covers evaluated at once.
+    Outputs:
+        num_tlcovs: The number of covers.
+        found: Whether u is the roots of some cover (False if u is None).
+        scores: scores[label] = (extremum, count, found_best), where extremum is None and count is 0 if there are no covers,
+            count is the number of extremal covers, and found_best is whether u is the roots of an extremal cover.
+    """
+    if np is None: raise ImportError("score_covers requires NumPy")
+    num_tlcovs, found = 0, False
+    scores = {label: (None, 0, False) for label in labels}
+    tlcovs = iter(tlcovs)
+    while True:
+        chunk = CoverSet(itr.islice(tlcovs, chunk_size))
+        if len(chunk) == 0: break
+        num_tlcovs += len(chunk)
+        matches = chunk.matches(u) if u is not None else np.zeros(len(chunk), dtype=bool)
+        found = found or bool(matches.any())
+        for (label, values) in chunk.objectives(labels).items():
+            better = _criteria[label][1]
+            extremum = int(values.max() if better is max else values.min())
+            best_extremum, count, found_best = scores[label]
+            if best_extremum is not None and extremum != best_extremum:
+                if better(extremum, best_extremum) == best_extremum: continue
+                count, found_best = 0, False
+            extremal = values == extremum
+            scores[label] = (extremum, count + int(extremal.sum()), found_best or bool(matches[extremal].any()))
+    return num_tlcovs, found, scores
+
+# Cover files (see save_covers) start with _COVER_MAGIC and a header of little-endian unsigned 64-bit integers:
+# the number of covers, and the byte positions of the offset array and of the pickled symbol table.
+_COVER_MAGIC = b"COPCTCV1"
+_COVER_HEADER = st.Struct("<3Q")
+
+def _writeVarint(out, n):
+    # append the unsigned LEB128 encoding of n to the bytearray out
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _readVarint(buf, pos):
+    # decode the unsigned LEB128 integer at buf[pos], returning it and the position after it
+    n, shift = 0, 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80: return n, pos
+        shift += 7
+
+def save_covers(filename, tlcovs):
+    """
+    Saves top-level covers to a compact binary cover file that load_covers can read without loading it all.
+    The file holds one record per cover, of varint-encoded integers: the number of roots L, the L root ids,
+    then k, d_min, d_max and ts.  Root ids index a symbol table of the distinct roots, which is pickled
+    after the records together with an array of the byte offsets of each record.
+    Inputs:
+        filename: The name of the cover file to write.
+        tlcovs: An iterable of top-level covers as returned by explain (e.g., a list, generator, CoverSet or CoverFile).
+    Outputs:
+        num_tlcovs: The number of covers saved.
+    """
+    symbols, ids, ids_by_object = [], {}, {}
+    offsets = []
+    with open(filename, "wb") as f:
+        f.write(_COVER_MAGIC + _COVER_HEADER.pack(0, 0, 0))
+        position = len(_COVER_MAGIC) + _COVER_HEADER.size
+        record = bytearray()
+        for (u,k,d_min,d_max,ts) in tlcovs:
+            offsets.append(position)
+            del record[:]
+            _writeVarint(record, len(u))
+            for r in _rootIds(u, symbols, ids, ids_by_object): _writeVarint(record, r)
+            for column in (k, d_min, d_max, ts):
+                for n in column: _writeVarint(record, n)
+            f.write(record)
+            position += len(record)
+        offsets.append(position)
+        offsets_position = position
+        f.write(st.pack("<%dQ"%len(offsets), *offsets))
+        symbols_position = offsets_position + 8*len(offsets)
+        pkl.dump(symbols, f, pkl.HIGHEST_PROTOCOL)
+        f.seek(len(_COVER_MAGIC))
+        f.write(_COVER_HEADER.pack(len(offsets)-1, offsets_position, symbols_position))
+    return len(offsets)-1
+
+def load_covers(filename):
+    """
+    Opens a cover file written by save_covers.
+    Inputs:
+        filename: The name of the cover file.
+    Outputs:
+        tlcovs: A CoverFile, which can be indexed and iterated over like the list of covers that was saved.
+    """
+    return CoverFile(filename)
+
+class CoverFile(object):
+    """
+    A read-only, memory-mapped view of a cover file written by save_covers.
+    Only the symbol table is loaded when the file is opened; each cover is decoded from the mapped file
+    when it is indexed or reached by iteration, so the operating system pages the file in as needed.
+    Can be used as a context manager that closes the file; otherwise it is closed when garbage collected.
+    Attributes:
+        symbols: The distinct roots of the saved covers.
+    """
+    def __init__(self, filename):
+        self._file = open(filename, "rb")
+        self._map = mm.mmap(self._file.fileno(), 0, access=mm.ACCESS_READ)
+        if self._map[:len(_COVER_MAGIC)] != _COVER_MAGIC:
+            self.close()
+            raise ValueError("%s is not a cover file"%filename)
+        self._num_tlcovs, self._offsets_position, symbols_position = _COVER_HEADER.unpack_from(self._map, len(_COVER_MAGIC))
+        self.symbols = pkl.loads(self._map[symbols_position:])
+    def close(self):
+        self._map.close()
+        self._file.close()
+    def __del__(self):
+        if hasattr(self, "_map"): self.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc_info):
+        self.close()
+    def __len__(self):
+        return self._num_tlcovs
+    def _offset(self, c):
+        return st.unpack_from("<Q", self._map, self._offsets_position + 8*c)[0]
+    def _decode(self, pos):
+        # decode the record at pos, returning the cover and the position after it
+        buf = self._map
+        L, pos = _readVarint(buf, pos)
+        values = []
+        for _ in range(5*L+1):
+            n = buf[pos]
+            pos += 1
+            if n >= 0x80: n, pos = _readVarint(buf, pos-1) # multi-byte values are rare
+            values.append(n)
+        return (tuple([self.symbols[r] for r in values[:L]]), tuple(values[L:2*L+1]),
+            tuple(values[2*L+1:3*L+1]), tuple(values[3*L+1:4*L+1]), tuple(values[4*L+1:])), pos
+    def __getitem__(self, c):
+        if c < 0: c += len(self)
+        if not 0 <= c < len(self): raise IndexError("cover index out of range")
+        return self._decode(self._offset(c))[0]
+    def __iter__(self):
+        if len(self) == 0: return
+        pos = self._offset(0)
+        for _ in range(len(self)):
+            t, pos = self._decode(pos)
+            yield t
@@ -1,3 +1,5 @@
+import copct
+
 def coverToMatlab(cover, fname):
     # cover is (u,k) pair
     matFile = open(fname, "w")
@@ -30,6 +32,11 @@ def coverToMatlab(cover, fname):
         matFile.write("e(end).state = d(%d).state;\n"%k)
     matFile.close()
 
+def savedCoverToMatlab(covers_filename, c, fname):
+    # export the c^th cover in a file saved by copct.save_covers, without loading the others
+    with copct.load_covers(covers_filename) as tlcovs:
+        coverToMatlab(tlcovs[c], fname)
+
 def main():
     cover = (
         (None, "task1", (1,((1,2),(3,4)))),
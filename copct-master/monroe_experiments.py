@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
+import os
 import time
+import functools
 import pickle as pkl
 import numpy as np
 import matplotlib as mpl
@@ -26,9 +28,24 @@ def run_sample(M, causes, u_correct, w, verbose=True, timeout=600, timeout_irr=3
     """
 
     # run copct
-    start = time.clock()
+    start = time.perf_counter()
     status, tlcovs, g = copct.explain(causes, w, M=M, verbose=verbose, timeout=timeout, max_tlcovs=max_tlcovs)
-    runtime = time.clock()-start
+    runtime = time.perf_counter()-start
+
+    return score_sample(u_correct, status, tlcovs, runtime, timeout_irr=timeout_irr)
+
+def score_sample(u_correct, status, tlcovs, runtime, timeout_irr=300):
+    """
+    Evaluate the explanations found for one sample plan.
+    Inputs:
+        u_correct: the "correct" cover against which copct is tested
+        status, tlcovs: the exit status and top-level covers returned by copct.explain
+            (tlcovs can be any iterable that can be read twice, e.g., a copct.CoverFile)
+        runtime: the run time of copct.explain
+        timeout_irr: timout for irredundancy
+    Outputs:
+        result: dictionary with various key:value pairs summarizing the outcomes of the experiment.
+    """
 
     # record execution info
     result = {}
@@ -36,26 +53,16 @@ def run_sample(M, causes, u_correct, w, verbose=True, timeout=600, timeout_irr=3
     result["status"] = status
     if not status == "Success": return result
 
-    # top-level results
-    result["correct"] = u_correct in [u for (u,_,_,_,_) in tlcovs]
-    result["|tlcovs|"] = len(tlcovs)
+    # top-level results and parsimony criteria, all evaluated in one streaming pass over the covers
+    labels = ["mc", "md", "xd", "fsn", "fsx", "mp"]
+    result["|tlcovs|"], result["correct"], scores = copct.score_covers(tlcovs, u_correct, labels)
     print("correct=%s, |tlcovs|=%d"%(result["correct"], result["|tlcovs|"]))
-
-    # compare parsimony criteria
-    criteria = [("_mc", copct.minCardinalityTLCovers),
-                ("_md", copct.maxDepthTLCovers),
-                ("_xd", copct.minimaxDepthTLCovers),
-                ("_fsn", copct.minForestSizeTLCovers),
-                ("_fsx", copct.maxForestSizeTLCovers),
-                ("_mp", copct.minParametersTLCovers)]
-    for (label, fun) in criteria:
-        pruned_tlcovs, extremum = fun(tlcovs)
-        correct = u_correct in [u for (u,_,_,_,_) in pruned_tlcovs]
-        count = len(pruned_tlcovs)
-        result["correct%s"%label] = correct
-        result["|tlcovs%s|"%label] = count
-        result["extremum%s"%label] = extremum
-        print("%s: correct=%s, count=%d, extremum=%d"%(label, correct, count, extremum))
+    for label in labels:
+        extremum, count, correct = scores[label]
+        result["correct_%s"%label] = correct
+        result["|tlcovs_%s|"%label] = count
+        result["extremum_%s"%label] = extremum
+        print("_%s: correct=%s, count=%d, extremum=%s"%(label, correct, count, extremum))
 
     # special handling for irredundancy
     status, tlcovs_irr = copct.irredundantTLCovers(tlcovs, timeout=timeout_irr)
@@ -67,15 +74,34 @@ def run_sample(M, causes, u_correct, w, verbose=True, timeout=600, timeout_irr=3
 
     return result
 
-def run_experiments(use_original=True, num_samples=None, filename=None, verbose=True, timeout=600, timeout_irr=300, max_tlcovs=13000000):
+def reduce_sample(sample, status, tlcovs, runtime, use_original=True, timeout_irr=300, covers_dir=None):
+    """
+    Score one sample plan inside its copct.explain_many worker, so that its top-level covers never leave the worker.
+    Inputs:
+        sample: the plan # in the corpus
+        status, tlcovs, runtime: as passed by copct.explain_many to its reducer
+        use_original, timeout_irr, covers_dir: as in run_experiments
+    Outputs:
+        result: dictionary with various key:value pairs summarizing the outcomes of the experiment (see score_sample).
+    """
+    u_correct = corpus[sample][0] if use_original else corpus[sample][1]
+    if covers_dir is not None:
+        copct.save_covers(os.path.join(covers_dir, "%d.covers"%sample), tlcovs)
+    return score_sample(u_correct, status, tlcovs, runtime, timeout_irr=timeout_irr)
+
+def run_experiments(use_original=True, num_samples=None, filename=None, verbose=True, timeout=600, timeout_irr=300, max_tlcovs=13000000, workers=1, covers_dir=None):
     """
     Run experiments on many samples in the corpus.
     Inputs:
         use_original: if True, run on the original corpus, otherwise run on the modified
         num_samples: number of randomly chosen sample plans from the corpus to use.  Defaults to all of them.
-        filename: name of file in which to save results.
+        filename: name of file in which to save results (see load_results).
             Defaults to "monroe_results.pkl" or "monroe_results_modified.pkl" depending on use_original flag.
         verbose, timeout, timeout_irr, max_tlcovs: additional parameters for run_sample
+        workers: number of samples explained and scored at once by copct.explain_many.
+            Samples still running 10 seconds after their timeout are killed.
+        covers_dir: if given, the top-level covers of each sample are saved in this directory
+            with copct.save_covers, as "<plan #>.covers", for rescore_experiments.
     Outputs:
        results[s]: dictionary or results for s^th sample plan
     """
@@ -88,26 +114,67 @@ def run_experiments(use_original=True, num_samples=None, filename=None, verbose=
         if use_original: filename = "monroe_results.pkl"
         else: filename = "monroe_results_modified.pkl"
 
-    # Run experiments
+    if use_original:
+        causes = md.causes
+    else:
+        causes = md.mid_causes
+    demos = {sample: corpus[sample][2] for sample in samples}
+
+    # Run experiments, appending each result to the file as it completes
+    print("Starting %d samples from %s corpus..."%(len(samples), "original" if use_original else "modified"))
     results = {}
-    for s in range(len(samples)):
-        sample = samples[s]
-        print("Starting sample %d of %d (plan # %d in %s corpus)..."%(s, len(samples), sample, "original" if use_original else "modified"))
-        if use_original:
-            u_correct = corpus[sample][0]
-            causes = md.causes
-        else:
-            u_correct = corpus[sample][1]
-            causes = md.mid_causes
-        w = corpus[sample][2]
-        results[sample] = run_sample(md.M, causes, u_correct, w, verbose=verbose, timeout=timeout, max_tlcovs=max_tlcovs, timeout_irr=timeout_irr)
-        results_file = open(filename, "w")
-        pkl.dump(results, results_file)
-        results_file.close()
-        print("%d of %d samples processed..."%(s+1, len(samples)))
+    results_file = open(filename, "wb")
+    reducer = functools.partial(reduce_sample, use_original=use_original, timeout_irr=timeout_irr, covers_dir=covers_dir)
+    for (sample, status, result, _, runtime) in copct.explain_many(causes, demos, md.M, workers=workers, timeout=timeout, reducer=reducer, verbose=verbose, max_tlcovs=max_tlcovs):
+        print("Finished plan # %d (%s)..."%(sample, status))
+        if result is None: result = {"runtime": runtime, "status": status} # killed before scoring
+        results[sample] = result
+        pkl.dump({sample: results[sample]}, results_file)
+        results_file.flush()
+        print("%d of %d samples processed..."%(len(results), len(samples)))
+    results_file.close()
 
     return results
 
+def rescore_experiments(filename, covers_dir, use_original=True, timeout_irr=300):
+    """
+    Re-evaluate saved results from the covers saved by run_experiments, without running copct.explain again.
+    Inputs:
+        filename: name of file where results are saved
+        covers_dir: directory where the covers were saved
+        use_original: whether the results are for the original or the modified corpus
+        timeout_irr: timout for irredundancy
+    Outputs:
+       results[s]: dictionary or results for s^th sample plan
+    """
+    results = load_results(filename)
+    for sample in results:
+        covers_file = os.path.join(covers_dir, "%d.covers"%sample)
+        if not os.path.exists(covers_file): continue
+        u_correct = corpus[sample][0] if use_original else corpus[sample][1]
+        with copct.load_covers(covers_file) as tlcovs:
+            results[sample] = score_sample(u_correct, results[sample]["status"], tlcovs, results[sample]["runtime"], timeout_irr=timeout_irr)
+    return results
+
+def load_results(filename="monroe_results.pkl"):
+    """
+    Load results saved by run_experiments.
+    The file holds a sequence of pickled dictionaries, one per sample, which are merged.
+    Inputs:
+        filename: name of file where results are saved
+    Outputs:
+        results[s]: dictionary or results for s^th sample plan
+    """
+    results = {}
+    results_file = open(filename, "rb")
+    while True:
+        try:
+            results.update(pkl.load(results_file))
+        except EOFError:
+            break
+    results_file.close()
+    return results
+
 def show_results(filename="monroe_results.pkl"):
     """
     Print/plot results shown in publications
@@ -116,9 +183,7 @@ def show_results(filename="monroe_results.pkl"):
     """
 
     # load results
-    f = open(filename, "r")
-    results = pkl.load(f)
-    f.close()
+    results = load_results(filename)
 
     # accuracy
     for criterion in ["","_mc","_irr","_md","_xd", "_mp", "_fsn", "_fsx"]:
@@ -201,9 +266,7 @@ def show_u_precise(filename="monroe_results.pkl"):
     """
 
     # load results
-    f = open(filename, "r")
-    results = pkl.load(f)
-    f.close()
+    results = load_results(filename)
 
     # specificity
     counts = {}
@@ -240,7 +303,7 @@ def show_u_precise(filename="monroe_results.pkl"):
 
 if __name__ == "__main__":
 
-    full_experiments = raw_input("Run full experiments?  May use up to 32GB of RAM and over a week of CPU time. [y/n]")
+    full_experiments = input("Run full experiments?  May use up to 32GB of RAM and over a week of CPU time. [y/n]")
 
     # Run experiments.
     if full_experiments == "y":
@@ -254,4 +317,4 @@ if __name__ == "__main__":
     plt.ion()
     results = show_results() # original
     results_modified = show_results(filename="monroe_results_modified.pkl") # modified
-    raw_input("Enter to close...")
+    input("Enter to close...")
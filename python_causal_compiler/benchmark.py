@@ -0,0 +1,108 @@
+import sys
+sys.path.append('./compiler')
+sys.path.append('../copct-master')
+
+from compiler import Lexer
+from compiler import Parser
+from compiler import Facility_Domain_Compiler
+import timeit
+
+## Recording Facility Domain Compiler
+#
+#  @brief Facility domain compiler that keeps the parts of every argument
+#  tuple it compiles, so that they can be benchmarked
+class Recording_Compiler(Facility_Domain_Compiler.Facility_Domain_Compiler):
+	def __init__(self, parser):
+		Facility_Domain_Compiler.Facility_Domain_Compiler.__init__(self, parser)
+		self.arg_tuples = []
+
+	def compile_arg_tuple(self, parts):
+		self.arg_tuples.append(parts)
+		return Facility_Domain_Compiler.Facility_Domain_Compiler.compile_arg_tuple(self, parts)
+
+## Concatenated Argument Tuple
+#
+#  @brief Returns the argument tuple expression in the form the compiler
+#  used to emit: one single-element tuple per argument, concatenated
+def concat_arg_tuple(parts):
+	return '+'.join(expr if kind == 'CONT' else '('+expr+', )' for (kind, expr, _) in parts)
+
+## Tuples Built
+#
+#  @brief Counts the tuples an argument tuple expression builds: every
+#  tuple display and slice, plus one per concatenation (assuming that the
+#  arguments themselves contain no '+')
+def tuples_built(expr):
+	segments = expr.count('+') + 1
+	return segments + expr.count('+')
+
+## Linear State Lookup
+#
+#  @brief Returns STATE(keys[0], keys[1], ...) the way get_state used to:
+#  by scanning the state for its last entry named keys[0] (as dict(state)
+#  does for a state of pairs) and then indexing along the remaining keys
+def linear_state_lookup(state, keys):
+	ret = None
+	for obj in state:
+		if obj[0] == keys[0]:
+			ret = obj[1] if len(obj) == 2 else obj[1:]
+	for key in keys[1:]:
+		ret = ret[key]
+	return ret
+
+## Check State Accessors
+#
+#  @brief Checks that every compiled STATE(...) accessor agrees with the
+#  linear lookup, on a state of pairs and on a state of longer entries
+def check_state_accessors(textname, templatename):
+	text = open(textname, 'r').read()
+	compiler = Facility_Domain_Compiler.Facility_Domain_Compiler(Parser.Parser(Lexer.Lexer(text)))
+	result, M = compiler.interpret()
+	template = open(templatename, 'r').read()
+	domain = {'__name__': 'benchmark_domain'}
+	exec(template.replace('# INSERT CAUSES HERE', result), domain)
+
+	states = [
+		(('gripping', ('obj-1', 'obj-2')), ('obj-1', 'Block'), ('obj-2', 'DockDrawer')),
+		(('gripping', 'obj-2', 'obj-1', 0, 0, 0), ('obj-1', 'Block', 1, 2, 3, 0), ('obj-2', 'DockCase', 4, 5, 6, 90)),
+	]
+	print(['STATE path', 'Checked states'])
+	for p in range(0, len(compiler.state_paths)):
+		keys = eval('(' + compiler.state_paths[p] + ',)')
+		for state in states:
+			expected = linear_state_lookup(state, keys)
+			actual = domain['get_state_' + str(p)](state)
+			assert actual == expected, 'STATE(%s) gives %r, not %r' % (compiler.state_paths[p], actual, expected)
+		print([compiler.state_paths[p], len(states)])
+
+def benchmark(textname, templatename, number=100000):
+	text = open(textname, 'r').read()
+	compiler = Recording_Compiler(Parser.Parser(Lexer.Lexer(text)))
+	result, M = compiler.interpret()
+
+	# The generated domain provides the state accessors used by the arguments
+	template = open(templatename, 'r').read()
+	domain = {'__name__': 'benchmark_domain'}
+	exec(template.replace('# INSERT CAUSES HERE', result), domain)
+
+	# A sequence of three actions with enough arguments for every rule
+	state = (('gripping', ('obj-1', 'obj-2')), ('obj-1', 'Block'), ('obj-2', 'DockDrawer'))
+	domain['states'] = (state, state, state)
+	domain['arguments'] = tuple(tuple(range(10)) for _ in range(3))
+
+	print(['Arguments', 'Tuples (concatenated)', 'Tuples (compiled)', 'Runtime (concatenated)', 'Runtime (compiled)'])
+	totals = [0, 0, 0.0, 0.0]
+	for parts in compiler.arg_tuples:
+		old = concat_arg_tuple(parts)
+		new = Facility_Domain_Compiler.Facility_Domain_Compiler.compile_arg_tuple(compiler, parts)
+		assert eval(old, domain) == eval(new, domain), 'argument tuples differ: %s' % new
+		row = [tuples_built(old), tuples_built(new)]
+		row += [timeit.timeit(expr, globals=domain, number=number) for expr in (old, new)]
+		totals = [t+r for (t, r) in zip(totals, row)]
+		print([new] + row)
+	print(['Total'] + totals)
+
+if __name__ == '__main__':
+	check_state_accessors('compiler/input/acceptance_causes.txt', 'compiler/templates/acceptance_template.txt')
+	check_state_accessors('compiler/input/acceptance_causes.txt', 'compiler/templates/facility_domain_template.txt')
+	benchmark('compiler/input/acceptance_causes.txt', 'compiler/templates/acceptance_template.txt')
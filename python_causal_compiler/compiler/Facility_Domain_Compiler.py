@@ -34,6 +34,11 @@ class Facility_Domain_Compiler(NodeVisitor):
 		#  Length of longest effect sequence (longest list of
 		#  actions / right side of a causal relation)
 		self.M = 0
+		## @var state_paths
+		#  Argument strings of the distinct STATE(...) paths, in order of
+		#  first appearance. Path i is read by the generated accessor
+		#  get_state_i
+		self.state_paths = []
 
 	## Visit Literal
 	#
@@ -148,14 +153,131 @@ class Facility_Domain_Compiler(NodeVisitor):
 
 		return arg_index_dict 
 
+	## State Accessor
+	#
+	# @brief Returns the call of the generated accessor function that reads
+	# a STATE(...) path from the current state (states[0]), registering
+	# the path if it has not been seen before
+	#
+	# @param path argument string of the STATE keyword, e.g. 'gripping',0
+	#
+	# @retval String call of the accessor
+	def state_accessor(self, path):
+		if path not in self.state_paths:
+			self.state_paths.append(path)
+		return 'get_state_'+str(self.state_paths.index(path))+'(states[0])'
+
+	## Compile State Accessors
+	#
+	# @brief Returns one function per registered STATE(...) path that
+	# indexes the cached dict view of a state along the path, so the
+	# view is built once per state rather than once per lookup
+	#
+	# @retval String valid python code
+	def compile_state_accessors(self):
+		result = ''
+		for p in range(0, len(self.state_paths)):
+			path = self.state_paths[p]
+			# the path is split on commas outside of quotes
+			keys = []
+			key = ''
+			quote = None
+			for c in path:
+				if quote:
+					if c == quote:
+						quote = None
+				elif c in '\'"':
+					quote = c
+				elif c == ',':
+					keys.append(key.strip())
+					key = ''
+					continue
+				key += c
+			keys.append(key.strip())
+			result += '# STATE('+path+')\n'
+			result += 'def get_state_'+str(p)+'(state):\n'
+			result += '    return state_values(state)'+''.join('['+key+']' for key in keys)+'\n\n'
+		return result
+
+	## Compile Argument Tuple
+	#
+	# @brief Returns an expression that builds the tuple of a list of
+	# compiled arguments with as few intermediate tuples as possible.
+	# Arguments are grouped into a single tuple display, except that a
+	# group of contiguous arguments[i][j], arguments[i][j+1], ... becomes a
+	# slice of arguments[i], and a CONT slice absorbs the contiguous group
+	# before it. Groups and CONT slices are concatenated.
+	#
+	# @param parts List of (kind, expression, indices) where kind is 'ITEM'
+	# for a single argument or 'CONT' for the slice arguments[i][j:], and
+	# indices is (i, j) when the expression reads arguments[i][j] (or
+	# starts the slice there), otherwise None
+	#
+	# @retval String python expression of the tuple
+	def compile_arg_tuple(self, parts):
+		# segments = expressions of the groups and slices to concatenate
+		segments = []
+		group = []
+		for (kind, expr, indices) in parts + [('END', None, None)]:
+			if kind == 'ITEM':
+				group.append((expr, indices))
+				continue
+			# run = (i, j, n) if the group reads arguments[i][j:j+n]
+			run = None
+			if len(group) > 0 and group[0][1] is not None:
+				i, j = group[0][1]
+				if all(group[n][1] == (i, j+n) for n in range(0, len(group))):
+					run = i, j, len(group)
+			if kind == 'CONT' and run is not None and indices == (run[0], run[1]+run[2]):
+				segments.append('arguments['+str(run[0])+']['+str(run[1])+':]')
+			else:
+				if run is not None and run[2] > 1:
+					segments.append('arguments['+str(run[0])+']['+str(run[1])+':'+str(run[1]+run[2])+']')
+				elif len(group) > 0:
+					segments.append('('+', '.join(e for (e, _) in group)+(',)' if len(group) == 1 else ')'))
+				if kind == 'CONT':
+					segments.append(expr)
+			group = []
+		if len(segments) == 0:
+			return '()'
+		return '+'.join(segments)
+
+	## Compile Argument
+	#
+	# @brief Returns the (kind, expression, indices) part of
+	# compile_arg_tuple for a variable argument
+	#
+	# @param arg name of the variable
+	# @param arg_indices Dictionary with expression keys and i,j values where i and j are indices in the arguments 2d array
+	#
+	# @retval (String, String, (int, int)) part for compile_arg_tuple
+	def compile_arg(self, arg, arg_indices):
+		i,j = arg_indices[arg]
+		return 'ITEM', 'arguments['+i+']['+j+']', (int(i), int(j))
+
+	## Compile Continuation
+	#
+	# @brief Replaces the last part of a list of parts for compile_arg_tuple
+	# by the slice of the remaining arguments starting there (the CONT
+	# keyword)
+	#
+	# @param parts List of parts for compile_arg_tuple
+	# @param prev_arg name of the variable before the CONT keyword
+	# @param arg_indices Dictionary with expression keys and i,j values where i and j are indices in the arguments 2d array
+	#
+	# @retval none
+	def compile_cont(self, parts, prev_arg, arg_indices):
+		i,j = arg_indices[prev_arg]
+		parts[-1] = ('CONT', 'arguments['+i+']['+j+':]', (int(i), int(j)))
+
 	## Visit Caus
 	#
-	# @brief Returns a three tuple of the form if statement, g.add statement,
-	# argument indices dictionary.
+	# @brief Returns a four tuple of the form action names key, g.add statement,
+	# argument indices dictionary, intention name.
 	#
 	# @param node AST instance to be evaluated
 	#
-	# @retval (String, String, {String, (String, String)}) tuple of various return strings and index reference dictionary
+	# @retval (String, String, {String, (String, String)}, String) tuple of various return strings and index reference dictionary
 	def visit_Caus(self, node):
 		# acts = the right-side of the causal statement. Represent
 		#		 the actions that cause the 'intention' 
@@ -168,12 +290,12 @@ class Facility_Domain_Compiler(NodeVisitor):
 		foldl = lambda func, acc, xs: functools.reduce(func, xs, acc)
 
 		# isolates and formats the names of the acts in order to be
-		# used in the if statement
+		# used as the key of the rule in the rules dictionary
 		act_names = foldl(operator.add, '', map(lambda x: '\''+x[0]+'\',', acts))
 
-		# if_stmt = initial if statement that differentiates causal
-		#			rules
-		if_stmt = 'if actions == (' + act_names + '):\n'		
+		# key = tuple of action names that differentiates causal
+		#		rules
+		key = '(' + act_names + ')'
 
 		intention_Args = act[1]
 
@@ -182,51 +304,34 @@ class Facility_Domain_Compiler(NodeVisitor):
 		#				is the i,j indices in the 2d arguments array
 		arg_indices = self.create_Action_Arg_Index_Reference_Dict(acts)
 
-		args = ''
+		# parts = compiled arguments, built into one tuple by
+		#		  compile_arg_tuple
+		parts = []
 
 		# iterate through all the arguments to the intention
 		for a in range(0, len(intention_Args)):
 			arg = intention_Args[a]
 			if isinstance(arg, (list, tuple)):
 				if arg[0] == 'LITERAL':
-					if a == len(intention_Args)-1:
-						args += '(\''+arg[1]+'\',)'
-					else:
-						args += '(\''+arg[1]+'\',)+'
+					parts.append(('ITEM', '\''+arg[1]+'\'', None))
 				elif arg[0] == 'STATE':
-					if a == len(intention_Args)-1:
-						args += '(get_state(states[0],'+arg[1]+'),)'
-					else:
-						args += '(get_state(states[0],'+arg[1]+'),)+'
+					parts.append(('ITEM', self.state_accessor(arg[1]), None))
 				elif arg[0] == 'PYTHON':
-					if a == len(intention_Args)-1:
-						args += '('+arg[1]+',)'
-					else:
-						args += '('+arg[1]+',)+'						
+					parts.append(('ITEM', arg[1], None))
 				else:
 					raise Exception('Argument '+str(arg)+' is of invalid type!')
 			elif arg in arg_indices:
-				i,j = arg_indices[arg]
-				# Don't add + to last argument string
-				if (a == len(intention_Args)-1):
-					args += '(arguments['+i+']['+j+'], )' 
-				else:
-					args += '(arguments['+i+']['+j+'], )+' 
+				parts.append(self.compile_arg(arg, arg_indices))
 			elif arg[:4] == 'CONT':
-					prev_arg = intention_Args[a-1]
-					i,j = arg_indices[prev_arg]
-					args = args[:len(args)-(18+len(i)+len(j))] + 'arguments['+i+']['+j+':]'
+				self.compile_cont(parts, intention_Args[a-1], arg_indices)
 			elif arg == 'NONE':
-				if a == len(intention_Args)-1:
-					args += '((),)'					
-				else:	
-					args += '((),)+'									
+				parts.append(('ITEM', '()', None))
 			else:
 				raise Exception('Could not find argument: ', arg)
 
-		gadd = 'g.add((states[0],\''+act[0]+'\','+args+'))\n'
+		gadd = 'g.add((states[0],\''+act[0]+'\','+self.compile_arg_tuple(parts)+'))\n'
 
-		return (if_stmt, gadd, arg_indices, act[0])
+		return (key, gadd, arg_indices, act[0])
 
 	## Visit No Conditional
 	#
@@ -272,7 +377,7 @@ class Facility_Domain_Compiler(NodeVisitor):
 	# @retval (String, String) representing two return strings for conditionals
 	def compile_bool(self, cond, arg_indices):
 		# body     = Additional things added to the body of if_stmt.
-		#			 This could include calls to lookup_type or
+		#			 This could include lookups in the state index or
 		#			 defining local variables
 		# if_stmt  = Handles conditional relationship rules. For
 		#			 example, this if statement would include
@@ -291,43 +396,31 @@ class Facility_Domain_Compiler(NodeVisitor):
 
 		if comp == '==':
 			if expr1[0] == 'ALL':
-				# make the body statement develop a list of all objects of type
-				# expr1[1] in the current state (state[0])
-				body += 'all_'+expr1[1]+' = [obj_id for (obj_id, obj_type,_,_,_,_)'
-				body += ' in states[0] if obj_type == \''+expr1[1]+'\']\n'
+				# make the body statement look up the sorted list of all objects
+				# of type expr1[1] in the index of the current state (state[0])
+				body += 'all_'+expr1[1]+' = type_objects(states[0]).get(\''+expr1[1]+'\', ())\n'
 				# find argument indices for the left-side of the comparison so
 				# that they can be appropriately referenced in the if_stmt
-				args = ''
+				parts = []
 				for a in range(0, len(expr2)):
 					arg = expr2[a]
-
 					if isinstance(arg, (tuple, list)):
 						if arg[0] == 'STATE':
-							if a == len(expr2) -1 :
-								args += '(get_state(states[0],'+str(arg[1])+'),)'
-							else:
-								args += '(get_state(states[0],'+str(arg[1])+'),)+'
+							parts.append(('ITEM', self.state_accessor(str(arg[1])), None))
 						else:
-							raise Exception('Bad arg type to TYPE: '+str(arg))
+							raise Exception('Bad arg type to ALL: '+str(arg))
 					# Handle the special case of Keyword CONT
 					elif arg[:4] == 'CONT':
-						prev_arg = expr2[a-1]
-						i,j = arg_indices[prev_arg]
-						args = args[:len(args)-(18+len(i)+len(j))] + 'arguments['+i+']['+j+':]'
+						self.compile_cont(parts, expr2[a-1], arg_indices)
 					else:
-						i,j = arg_indices[arg]
-						# don't add + sign if it is the last argument
-						if (a == len(expr2) - 1):
-							args += '(arguments['+i+']['+j+'], )'
-						else:
-							args += '(arguments['+i+']['+j+'], )+'
-				if_stmt += 'if set(all_'+expr1[1]+') == set('+args+'):\n'
+						parts.append(self.compile_arg(arg, arg_indices))
+				if_stmt += 'if set(all_'+expr1[1]+') == set('+self.compile_arg_tuple(parts)+'):\n'
 			elif expr1[0] == 'TYPE':
 				var_get = ''
 				var_name = ''
 				if isinstance(expr1[1], (tuple, list)):
 					if expr1[1][0] == 'STATE':
-						var_get = 'get_state(states[0],'+str(expr1[1][1])+'),)'
+						var_get = self.state_accessor(str(expr1[1][1]))
 						var_name = self.id_generator()
 					else:
 						raise Exception('Bad arg type to TYPE: '+str(expr1[1]))
@@ -335,7 +428,7 @@ class Facility_Domain_Compiler(NodeVisitor):
 					var_name = str(expr1[1])
 					i,j = arg_indices[var_name]
 					var_get = 'arguments['+i+']'+'['+j+']'
-				body += var_name+'_type = lookup_type('+var_get+', states[0])\n'
+				body += var_name+'_type = object_types(states[0]).get('+var_get+')\n'
 				if_stmt += 'if '+var_name+'_type == \''+str(expr2)+'\':\n'
 			else:
 				# var1 and var2 could be either variables or literals
@@ -364,40 +457,29 @@ class Facility_Domain_Compiler(NodeVisitor):
 				if_stmt += 'if '+var1+' == '+var2+':\n'
 		elif comp == '!=':
 			if expr1[0] == 'ALL':
-				# make the body statement develop a list of all objects of type
-				# expr1[1] in the current state (state[0])
-				body += 'all_'+expr1[1]+' = [obj_id for (obj_id, obj_type,_,_,_,_)'
-				body += ' in states[0] if obj_type == \''+expr1[1]+'\']\n'
+				# make the body statement look up the sorted list of all objects
+				# of type expr1[1] in the index of the current state (state[0])
+				body += 'all_'+expr1[1]+' = type_objects(states[0]).get(\''+expr1[1]+'\', ())\n'
 				# find argument indices for the left-side of the comparison so
 				# that they can be appropriately referenced in the if_stmt
-				args = ''
+				parts = []
 				for a in range(0, len(expr2)):
 					arg = expr2[a]
-					# Handle the special case of Keyword CONT
 					if isinstance(arg, (tuple, list)):
 						if arg[0] == 'STATE':
-							if a == len(expr2) -1 :
-								args += '(get_state(states[0],'+str(arg[1])+'),)'
-							else:
-								args += '(get_state(states[0],'+str(arg[1])+'),)+'
+							parts.append(('ITEM', self.state_accessor(str(arg[1])), None))
 						else:
-							raise Exception('Bad arg type to TYPE: '+str(arg))
-					if arg[:4] == 'CONT':
-						prev_arg = expr2[a-1]
-						i,j = arg_indices[prev_arg]
-						args = args[:len(args)-(18+len(i)+len(j))] + 'arguments['+i+']['+j+':]'
+							raise Exception('Bad arg type to ALL: '+str(arg))
+					# Handle the special case of Keyword CONT
+					elif arg[:4] == 'CONT':
+						self.compile_cont(parts, expr2[a-1], arg_indices)
 					else:
-						i,j = arg_indices[arg]
-						# don't add + sign if it is the last argument
-						if (a == len(expr2) - 1):
-							args += '(arguments['+i+']['+j+'], )'
-						else:
-							args += '(arguments['+i+']['+j+'], )+'
-				if_stmt += 'if not set(all_'+expr1[1]+') == set('+args+'):\n'
+						parts.append(self.compile_arg(arg, arg_indices))
+				if_stmt += 'if not set(all_'+expr1[1]+') == set('+self.compile_arg_tuple(parts)+'):\n'
 			elif expr1[0] == 'TYPE':
 				if isinstance(expr1[1], (tuple, list)):
 					if expr1[1][0] == 'STATE':
-						var_get = 'get_state(states[0],'+str(expr1[1][1])+')'
+						var_get = self.state_accessor(str(expr1[1][1]))
 						var_name = self.id_generator()
 					else:
 						raise Exception('Bad arg type to TYPE: '+str(expr1[1]))
@@ -405,7 +487,7 @@ class Facility_Domain_Compiler(NodeVisitor):
 					var_name = str(expr1[1])
 					i,j = arg_indices[var_name]
 					var_get = 'arguments['+i+']'+'['+j+']'
-				body += var_name+'_type = lookup_type('+var_get+', states[0])\n'
+				body += var_name+'_type = object_types(states[0]).get('+var_get+')\n'
 				if_stmt += 'if not '+var_name+'_type == \''+str(expr2)+'\':\n'
 			else:
 				# var1 and var2 could be either variables or literals
@@ -473,7 +555,7 @@ class Facility_Domain_Compiler(NodeVisitor):
 			body, if_stmt = self.compile_bool(cond[1], arg_indices)
 			# Only add in tabs for body if there is a body
 			if body != '':
-				body = 2*tab + body
+				body = tab + body
 		else:
 			# op  = the previous operand (either && or ||). It 
 			#  		starts as 'if' for convenience sake as you'll
@@ -505,15 +587,16 @@ class Facility_Domain_Compiler(NodeVisitor):
 
 	## Visit Statement
 	#
-	# @brief Returns a String representing a properly compiled full statement,
+	# @brief Returns the key of a statement in the rules dictionary and a
+	# String representing the properly compiled body of its rule function,
 	# including both a conditional and causal relation. Output is also 
 	# appropriately tabbed.
 	#
 	# @param node AST instance to be evaluated
 	#
-	# @retval: String a single string that is close to valid Python
+	# @retval: (String, String, String) tuple of the form action names key, function body, intention name
 	def visit_Stmt(self, node):
-		# if_stmt 	  = initial if statement string that differentiates
+		# key 	  	  = tuple of action names that differentiates
 		#				which rule is being applied
 		# gadd    	  = g.add statement string that adds the result of the 
 		#				rule to the final set
@@ -521,7 +604,7 @@ class Facility_Domain_Compiler(NodeVisitor):
 		#				arguments array for each of the arguments of the
 		#				actions
 
-		if_stmt, gadd, arg_indices, intention = self.visit(node.caus)
+		key, gadd, arg_indices, intention = self.visit(node.caus)
 
 		# cond = tuple representing the conditions under which the rule
 		#		 holds. See visit_BoolExpr for more insight into the 
@@ -532,7 +615,7 @@ class Facility_Domain_Compiler(NodeVisitor):
 		comps = ['==', '<', '>', '<=', '>=']
 
 		# body     = Additional things added to the body of if_stmt.
-		#			 This could include calls to lookup_type or
+		#			 This could include lookups in the state index or
 		#			 defining local variables
 		# if_stmt2 = Handles conditional relationship rules. For
 		#			 example, this if statement would include
@@ -550,32 +633,55 @@ class Facility_Domain_Compiler(NodeVisitor):
 
 		# tabs required before the g.add and second if statements
 		# respectively
-		gadd_tabs = 3*tab
-		if_stmt2_tabs = 2*tab
+		gadd_tabs = 2*tab
+		if_stmt2_tabs = tab
 
 		# Change the tabbing if there is no conditional
 		if if_stmt2 == '':
 			if_stmt2_tabs = ''
-			gadd_tabs = 2*tab
+			gadd_tabs = tab
 
 		# DEBUGGING
 		debug_print = gadd_tabs + 'print(\''+intention+'\')\n'
 
-		# Return appropriately tabbed string of single if statement block
-		# from the causes() function in facility_domain.py
-		return tab + if_stmt + body + if_stmt2_tabs + if_stmt2 + gadd_tabs + gadd
+		# Return appropriately tabbed body of the rule's function
+		# in facility_domain.py
+		return key, body + if_stmt2_tabs + if_stmt2 + gadd_tabs + gadd, intention
 
 	## Visit Statements
 	#
-	# @brief Compile all statements and concatenate results
+	# @brief Compile each statement into its own rule function, followed
+	# by the rules dictionary that maps each tuple of action names to the
+	# list of rule functions that apply to it. causes() then finds the
+	# rules for a sequence of actions with a single dictionary lookup.
 	#
 	# @param node AST instance to be evaluated
 	#
 	# @retval: String valid python code
 	def visit_Stmts(self, node):
 		result = ''
-		for child in node.children:
-			result += self.visit(child)
+		# keys  = action name tuples in order of first appearance
+		# rules = dictionary from each key to its rule function names
+		keys = []
+		rules = {}
+		for r in range(0, len(node.children)):
+			key, body, intention = self.visit(node.children[r])
+			# intention names like 'move-to' are not valid identifiers
+			name = 'rule_'+str(r)+'_'+''.join(c if c.isalnum() else '_' for c in intention)
+			result += 'def '+name+'(states, actions, arguments, g):\n' + body + '\n'
+			if key not in rules:
+				keys.append(key)
+				rules[key] = []
+			rules[key].append(name)
+
+		# accessors of the STATE(...) paths used by the rules
+		result = self.compile_state_accessors() + result
+
+		result += '# rules[actions]: the rule functions for a sequence of action names\n'
+		result += 'rules = {\n'
+		for key in keys:
+			result += '    '+key+': ['+', '.join(rules[key])+'],\n'
+		result += '}\n'
 
 		return result
 
@@ -707,5 +813,6 @@ class Facility_Domain_Compiler(NodeVisitor):
 	#
 	# @retval (String, String) tuple of the form output code, output value of M 
 	def interpret(self):
+		self.state_paths = []
 		tree = self.parser.parse()
 		return self.visit(tree), str(self.M)
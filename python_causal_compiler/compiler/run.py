@@ -10,14 +10,48 @@
 #  @date 5/9/2017
 #
 #  @brief This file creates the Lexer and Parser and runs the two
-#  compilers.
+#  compilers, either writing their output to disk (main) or loading it
+#  in-process (compile_domain).
 
 from Lexer import Lexer
 from Parser import Parser
 from Facility_Domain_Compiler import Facility_Domain_Compiler
 from Imitation_Compiler import Imitation_Compiler
+import hashlib
 import os
 import sys
+import types
+
+## @var COMPILER_DIR
+#  Directory of the compiler, which holds the templates and output/load_demo.py
+COMPILER_DIR = os.path.dirname(os.path.abspath(__file__))
+## @var ROOT_DIR
+#  Root of the repository, which holds copct and pyhop
+ROOT_DIR = os.path.normpath(os.path.join(COMPILER_DIR, '..', '..'))
+
+## Insert Facility Domain
+#
+#  @brief Inserts the output of the facility domain compiler into its template
+#
+#  @param template text of the facility domain template
+#  @param result compiled causes code
+#  @param M value of M
+#
+#  @retval String source of facility_domain.py
+def insert_facility_domain(template, result, M):
+	inserted = template.replace('# INSERT CAUSES HERE', result)
+	return inserted.replace('M = 0 # INSERT M HERE', 'M = '+M)
+
+## Insert Imitation
+#
+#  @brief Inserts the output of the imitation compiler into its template
+#
+#  @param template text of the imitation template
+#  @param result compiled methods code
+#
+#  @retval String source of imitation.py
+def insert_imitation(template, result):
+	return template.replace('# INSERT METHODS HERE', result)
 
 ## Make Facility Domain
 #
@@ -46,8 +80,7 @@ def make_facility_domain(interpreter, log):
 	log.write('Completed running Facility Domain Compiler\n\n')
 
 	log.write('Adjusting Facility Domain template...\n')
-	inserted = template.replace('    # INSERT CAUSES HERE', result)
-	inserted = inserted.replace('M = 0 # INSERT M HERE', 'M = '+M)
+	inserted = insert_facility_domain(template, result, M)
 	log.write('Completed adjusting Facility Domain template!\n\n')
 
 	log.write('Writing to facility_domain.py...\n')
@@ -87,7 +120,7 @@ def make_imitation(interpreter, log):
 	log.write('Completed running Imitation Compiler\n\n')
 
 	log.write('Adjusting Imitation template...\n')
-	inserted = template.replace('# INSERT METHODS HERE', result)
+	inserted = insert_imitation(template, result)
 	log.write('Completed adjusting Imitation template!\n\n')
 
 	log.write('Writing to imitation.py...\n')
@@ -137,6 +170,87 @@ def run_imitation(text, log):
 	log.write('Completed making Imitation Compiler!\n\n')
 	make_imitation(imitation_compiler, log)
 
+## Load Module
+#
+#  @brief Executes python source into a new module object
+#
+#  @param name name of the module
+#  @param source python source of the module
+#  @param filename file name shown in tracebacks
+#
+#  @retval module the executed module
+def load_module(name, source, filename):
+	module = types.ModuleType(name)
+	module.__file__ = filename
+	exec(compile(source, filename, 'exec'), module.__dict__)
+	return module
+
+## Compile Domain
+#
+#  @brief Compiles causal language text in-process, without writing
+#  facility_domain.py and imitation.py to the output directory or starting
+#  a new interpreter. The generated sources are executed into module
+#  objects, and the methods are declared in pyhop as imitation.py would.
+#  If cache_dir is given, the generated sources are saved there under a
+#  hash of the text and templates, and reused when the same text is
+#  compiled again.
+#
+#  @param text string representation of the causal input language text
+#  @param cache_dir optional directory of cached generated sources
+#
+#  @retval (function, int, dict) tuple of the form causes, M, methods, where
+#  methods maps each task name to the pyhop methods declared for it
+def compile_domain(text, cache_dir=None):
+	templates = os.path.join(COMPILER_DIR, 'templates')
+	facility_template = open(os.path.join(templates, 'facility_domain_template.txt'), 'r').read()
+	imitation_template = open(os.path.join(templates, 'imitation_template2.txt'), 'r').read()
+
+	# filenames = where the generated sources are (or would be) cached
+	key = hashlib.sha256((text + facility_template + imitation_template).encode('utf-8')).hexdigest()
+	filenames = ['<facility_domain>', '<imitation>']
+	if cache_dir is not None:
+		filenames = [os.path.join(cache_dir, key+'_facility_domain.py'), os.path.join(cache_dir, key+'_imitation.py')]
+
+	if cache_dir is not None and all(os.path.exists(filename) for filename in filenames):
+		sources = [open(filename, 'r').read() for filename in filenames]
+	else:
+		result, M = Facility_Domain_Compiler(Parser(Lexer(text))).interpret()
+		sources = [insert_facility_domain(facility_template, result, M)]
+		result = Imitation_Compiler(Parser(Lexer(text))).interpret()
+		sources.append(insert_imitation(imitation_template, result))
+		if cache_dir is not None:
+			if not os.path.isdir(cache_dir):
+				os.makedirs(cache_dir)
+			for (filename, source) in zip(filenames, sources):
+				# written under a temporary name so that a partial file is never read
+				tmp_filename = filename + '.tmp'
+				with open(tmp_filename, 'w') as f:
+					f.write(source)
+				os.replace(tmp_filename, filename)
+
+	# The generated sources import copct, pyhop and load_demo, and append
+	# cwd-relative paths to sys.path, which is restored afterwards
+	saved_path = list(sys.path)
+	sys.path.extend([os.path.join(ROOT_DIR, 'copct-master'), os.path.join(ROOT_DIR, 'dananau-pyhop-195ab6320571'), os.path.join(COMPILER_DIR, 'output')])
+	saved_facility_domain = sys.modules.get('facility_domain')
+	try:
+		facility_domain = load_module('facility_domain', sources[0], filenames[0])
+		# imitation.py imports causes and M from facility_domain
+		sys.modules['facility_domain'] = facility_domain
+		import pyhop
+		declared = dict(pyhop.methods)
+		load_module('imitation', sources[1], filenames[1])
+	finally:
+		sys.path[:] = saved_path
+		if saved_facility_domain is None:
+			sys.modules.pop('facility_domain', None)
+		else:
+			sys.modules['facility_domain'] = saved_facility_domain
+
+	# declare_methods makes a new list of methods for each task it declares
+	methods = {task: pyhop.methods[task] for task in pyhop.methods if declared.get(task) is not pyhop.methods[task]}
+	return facility_domain.causes, facility_domain.M, methods
+
 def main():
 	log_file = os.path.normpath("./python_causal_compiler/compiler/logs/compiler/log.txt")
 	log = open(log_file, "w")
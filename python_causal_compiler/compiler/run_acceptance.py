@@ -27,7 +27,7 @@ def make_facility_domain(interpreter):
 	print('Running Facility Domain Compiler')
 	result, M = interpreter.interpret()
 
-	inserted = template.replace('    # INSERT CAUSES HERE', result)
+	inserted = template.replace('# INSERT CAUSES HERE', result)
 	inserted = inserted.replace('M = 0 # INSERT M HERE', 'M = '+M)
 
 	facility_domain_py.write(inserted)
@@ -110,7 +110,7 @@ def run_experiments(check_irr=True):
             exec_str = "from baxter_corpus.%s_ground_truth import ground_truth"%demo_name
             exec(exec_str, globals())
             # Cover and prune by each parsimony criterion
-            start_time = time.clock()
+            start_time = time.perf_counter()
             status, tlcovs, g = copct.explain(causes, demo, M=M)
 
             # I ADDED THIS!!
@@ -126,8 +126,8 @@ def run_experiments(check_irr=True):
             for intention in pcovs[0][0]:
                print(intention[1:])
 
-            results[demo_name]["run_times"].append(time.clock()-start_time)
-            results[demo_name]["run_time"] += time.clock()-start_time
+            results[demo_name]["run_times"].append(time.perf_counter()-start_time)
+            results[demo_name]["run_time"] += time.perf_counter()-start_time
             results[demo_name]["tlcovs"], results[demo_name]["g"] = tlcovs, g
             results[demo_name]["tlcovs_mc"] = [u for (u,_,_,_,_) in copct.minCardinalityTLCovers(tlcovs)[0]]
             results[demo_name]["tlcovs_md"] = [u for (u,_,_,_,_) in copct.maxDepthTLCovers(tlcovs)[0]]
@@ -135,13 +135,13 @@ def run_experiments(check_irr=True):
             results[demo_name]["tlcovs_mp"] = [u for (u,_,_,_,_) in copct.minParametersTLCovers(tlcovs)[0]]
             results[demo_name]["tlcovs_fsn"] = [u for (u,_,_,_,_) in copct.minForestSizeTLCovers(tlcovs)[0]]
             results[demo_name]["tlcovs_fsx"] = [u for (u,_,_,_,_) in copct.maxForestSizeTLCovers(tlcovs)[0]]
-            start_time = time.clock()
+            start_time = time.perf_counter()
             if check_irr:
                 status, tlcovs_irr = copct.irredundantTLCovers(tlcovs, timeout=1000)
                 if status == False: print("IRR timeout")
             else:
                 tlcovs_irr = tlcovs
-            results[demo_name]["run_time_irr"] = time.clock()-start_time
+            results[demo_name]["run_time_irr"] = time.perf_counter()-start_time
             results[demo_name]["tlcovs_irr"] = [u for (u,_,_,_,_) in tlcovs_irr]
             results[demo_name]["u in tlcovs"] = ground_truth in [u for (u,_,_,_,_) in tlcovs]
             results[demo_name]["u in tlcovs_mc"] = ground_truth in results[demo_name]["tlcovs_mc"]
@@ -176,5 +176,5 @@ def calc_std_dev(lst,avg):
 
 if __name__ == "__main__":
 
-    check_irr = raw_input("Run irredundancy checks?  May take several minutes. [y/n]")
+    check_irr = input("Run irredundancy checks?  May take several minutes. [y/n]")
     results = run_experiments(check_irr == "y")